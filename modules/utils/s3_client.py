@@ -1,21 +1,38 @@
 import os
+import threading
 import uuid
-import boto3
-from botocore.exceptions import NoCredentialsError, ClientError
 
 
-try:
-    AWS_S3_BUCKET_NAME = os.environ.get("AWS_S3_BUCKET_NAME")
-    AWS_DEFAULT_REGION = os.environ.get("AWS_DEFAULT_REGION")
+_s3_client = None
+_s3_client_lock = threading.Lock()
 
-    if not AWS_S3_BUCKET_NAME or not AWS_DEFAULT_REGION:
-        raise ValueError("AWS_S3_BUCKET_NAME or AWS_DEFAULT_REGION env vars not set.")
 
-    s3_client = boto3.client('s3', region_name=AWS_DEFAULT_REGION)
+def get_s3_client():
+    """
+    The shared boto3 S3 client, created on first use (importing boto3 and
+    building a client is slow, and most processes never upload anything).
+    Returns None if AWS_S3_BUCKET_NAME / AWS_DEFAULT_REGION are not set or
+    no credentials are available.
+    """
+    global _s3_client
+    if _s3_client is not None:
+        return _s3_client
 
-except (NoCredentialsError, ValueError) as e:
-    print(f"Error initializing S3 client: {e}")
-    s3_client = None
+    with _s3_client_lock:
+        if _s3_client is None:
+            import boto3
+            from botocore.exceptions import NoCredentialsError
+
+            try:
+                if not os.environ.get("AWS_S3_BUCKET_NAME") or not os.environ.get("AWS_DEFAULT_REGION"):
+                    raise ValueError("AWS_S3_BUCKET_NAME or AWS_DEFAULT_REGION env vars not set.")
+
+                _s3_client = boto3.client('s3', region_name=os.environ.get("AWS_DEFAULT_REGION"))
+
+            except (NoCredentialsError, ValueError) as e:
+                print(f"Error initializing S3 client: {e}")
+                return None
+    return _s3_client
 
 
 class S3Client:
@@ -25,22 +42,28 @@ class S3Client:
         """
         Uploads a file to AWS S3 and returns its public URL.
         """
+        s3_client = get_s3_client()
         if not s3_client:
             raise ConnectionError("S3 client not initialized.")
 
+        from botocore.exceptions import ClientError
+
+        bucket_name = os.environ.get("AWS_S3_BUCKET_NAME")
+        region = os.environ.get("AWS_DEFAULT_REGION")
+
         # Create a unique filename
         unique_filename = f"{uuid.uuid4()}-{file_name}"
 
         try:
             # Upload the file
             s3_client.put_object(
-                Bucket=AWS_S3_BUCKET_NAME,
+                Bucket=bucket_name,
                 Key=unique_filename,
                 Body=file_content,
                 ContentType=content_type,
             )
 
-            public_url = f"https://{AWS_S3_BUCKET_NAME}.s3.{AWS_DEFAULT_REGION}.amazonaws.com/{unique_filename}"
+            public_url = f"https://{bucket_name}.s3.{region}.amazonaws.com/{unique_filename}"
             return public_url
 
         except ClientError as e:
@@ -48,4 +71,4 @@ class S3Client:
             raise e
         except Exception as e:
             print(f"An unexpected error occurred during S3 upload: {e}")
-            raise e
\ No newline at end of file
+            raise e
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import prefetch_related_objects
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.contrib.contenttypes.fields import GenericRelation, GenericForeignKey
@@ -37,6 +38,11 @@ class Listing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Joined when search results are hydrated (__str__ needs the user) and
+    # when documents are built in bulk (see to_search_documents)
+    search_select_related = ("user",)
+    search_prefetch_related = ("images",)
+
     class Meta:
         ordering = ['-created_at']
 
@@ -44,11 +50,14 @@ class Listing(models.Model):
         return f"{self.listing_type.capitalize()}: {self.name} by {self.user.username}"
 
     def to_search_document(self):
-        first_image = self.images.first().image_url if self.images.exists() else ""
+        # One query on its own, none when images were prefetched
+        images = list(self.images.all())
+        first_image = min(images, key=lambda image: image.pk).image_url if images else ""
         text_for_embedding = f"{self.name} {self.category or ''} {self.description or ''}"
         return {
             "id": self.id,
             "title": self.name,
+            "listing_type": self.listing_type,
             "price": float(self.price),
             "unit": self.unit,
             "image": first_image,
@@ -64,6 +73,16 @@ class Listing(models.Model):
             "embedding": None,
         }
 
+    @classmethod
+    def to_search_documents(cls, listings):
+        """
+        to_search_document() for many listings with a constant number of
+        queries: users and images are loaded once for the whole batch.
+        """
+        listings = list(listings)
+        prefetch_related_objects(listings, *cls.search_select_related, *cls.search_prefetch_related)
+        return [listing.to_search_document() for listing in listings]
+
 
 class ListingImage(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
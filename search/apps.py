@@ -6,18 +6,15 @@ class SearchConfig(AppConfig):
 
     def ready(self):
         from django.db.models.signals import post_save, post_delete
-        from django.dispatch import receiver
-        from .models import SearchIndexEntry
-        from .services.search_services import index_object, delete_object_from_index
+        from . import signals
+        from . import checks  # noqa: F401 (registers the search system checks)
 
-        # Automatically index any model that has to_search_document
+        # Automatically index any model that has to_search_document.
+        # Module-level receivers: signals only hold weak references, so local
+        # closures defined here would be garbage collected and silently stop firing.
         from django.apps import apps
         for model in apps.get_models():
             if hasattr(model, "to_search_document"):
-                @receiver(post_save, sender=model)
-                def auto_index(sender, instance, **kwargs):
-                    index_object(instance)
-
-                @receiver(post_delete, sender=model)
-                def auto_delete(sender, instance, **kwargs):
-                    delete_object_from_index(instance)
+                label = model._meta.label_lower
+                post_save.connect(signals.auto_index, sender=model, dispatch_uid=f"search_auto_index_{label}")
+                post_delete.connect(signals.auto_delete, sender=model, dispatch_uid=f"search_auto_delete_{label}")
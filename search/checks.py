@@ -0,0 +1,23 @@
+# search/checks.py
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The result cache, generation pointers and discovery pools are invalidated across processes."""
+    from .services.search_services import result_cache
+
+    if result_cache.ttl > 0 and not result_cache.shared:
+        return [
+            Warning(
+                f"The {result_cache.cache_alias!r} cache is process-local, so search response caching is off.",
+                hint=(
+                    "Set REDIS_URL (or another shared cache backend) on the web and worker services. "
+                    "Index writes in search_worker could not invalidate responses cached by the web workers, "
+                    "and index promotions reach them only after the pointer cache TTL."
+                ),
+                id="search.W001",
+            )
+        ]
+    return []
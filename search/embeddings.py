@@ -1,20 +1,184 @@
-from typing import List
-import os
 import hashlib
+import re
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class EmbeddingProvider:
+    """
+    Interface every embedding backend implements.
+
+    `name` identifies the model and is part of every cache key, so two
+    providers never share vectors. `dimensions` must match the VectorField
+    the vectors are stored in.
+    """
+    name = ""
+    dimensions = 768
+    max_batch_size = 100
+    # Remote providers are paced by the quota settings (GEMINI_EMBED_*)
+    is_remote = True
+    # Per-call deadlines in seconds (None: the client's default) for
+    # "retrieval_query" calls and for everything else
+    query_timeout = None
+    batch_timeout = None
+
+    def embed(self, text: str, task_type: str = "retrieval_document") -> List[float]:
+        return self.embed_batch([text], task_type=task_type)[0]
+
+    def embed_batch(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        raise NotImplementedError
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    """Google Gemini text-embedding-004 (network call, quota limited)."""
+    name = "models/text-embedding-004"
+    dimensions = 768
+    # Gemini's batchEmbedContents endpoint accepts at most 100 documents per call.
+    max_batch_size = 100
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key if api_key is not None else getattr(settings, "GEMINI_API_KEY", None)
+        self.query_timeout = getattr(settings, "GEMINI_EMBED_QUERY_TIMEOUT", 2.0)
+        self.batch_timeout = getattr(settings, "GEMINI_EMBED_BATCH_TIMEOUT", 30.0)
+        self._genai = None
+
+    def _client(self):
+        # Imported and configured on the first call: the SDK (grpc, protobuf)
+        # is slow to import, and most processes never embed anything
+        if self._genai is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
+    def _request_options(self, task_type):
+        # Without a deadline a degraded API holds the calling worker until the client gives up
+        timeout = self.query_timeout if task_type == "retrieval_query" else self.batch_timeout
+        return {"timeout": timeout} if timeout else None
+
+    def embed(self, text, task_type="retrieval_document"):
+        result = self._client().embed_content(
+            model=self.name,
+            content=text,
+            task_type=task_type,
+            title="Embedding" if task_type == "retrieval_document" else None,
+            request_options=self._request_options(task_type),
+        )
+        return result['embedding']
+
+    def embed_batch(self, texts, task_type="retrieval_document"):
+        result = self._client().embed_content(
+            model=self.name,
+            content=list(texts),
+            task_type=task_type,
+            title="Embedding" if task_type == "retrieval_document" else None,
+            request_options=self._request_options(task_type),
+        )
+        return result['embedding']
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Offline hashing-vectorizer embeddings built with NumPy.
+
+    Words, word bigrams and character trigrams are hashed into signed buckets
+    and the result is L2-normalized. It has no notion of synonyms, but texts
+    sharing vocabulary land close together, which is enough to exercise the
+    full index/search stack in CI, load tests and local rebuilds without
+    network calls.
+    """
+    name = "hashing-v1"
+    max_batch_size = 1000
+    is_remote = False
+
+    TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+    CHAR_NGRAM_WEIGHT = 0.5
+
+    def __init__(self, dimensions=768):
+        self.dimensions = dimensions
+
+    def _features(self, text):
+        words = self.TOKEN_RE.findall((text or "").lower())
+        features = [(word, 1.0) for word in words]
+        features += [(f"{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [(padded[i:i + 3], self.CHAR_NGRAM_WEIGHT) for i in range(len(padded) - 2)]
+        return features
+
+    def _bucket(self, feature):
+        # Stable across processes, unlike the built-in (salted) hash()
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        sign = 1.0 if value >> 63 else -1.0
+        return value % self.dimensions, sign
+
+    def embed_batch(self, texts, task_type="retrieval_document"):
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            buckets = [self._bucket(feature) for feature, _ in features]
+            indices = np.fromiter((index for index, _ in buckets), dtype=np.int64, count=len(buckets))
+            values = np.fromiter(
+                (sign * weight for (_, sign), (_, weight) in zip(buckets, features)),
+                dtype=np.float32, count=len(buckets),
+            )
+            np.add.at(matrix[row], indices, values)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+
+def reduce_embedding(vector, dimensions: int) -> List[float]:
+    """
+    Matryoshka truncation: the first `dimensions` components, L2-normalized.
+    Models trained for it (text-embedding-004 is) keep most of their quality
+    in the leading components; reduced vectors are only comparable to reduced
+    vectors of the same model.
+    """
+    head = np.asarray(vector, dtype=np.float32)[:dimensions]
+    norm = np.linalg.norm(head)
+    return (head / norm if norm else head).tolist()
+
+
+PROVIDERS = {
+    "gemini": GeminiEmbeddingProvider,
+    "hashing": HashingEmbeddingProvider,
+}
+
+_provider = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    The provider selected by settings.SEARCH_EMBEDDING_PROVIDER: a key of
+    PROVIDERS or the dotted path of an EmbeddingProvider subclass.
+    """
+    global _provider
+    if _provider is None:
+        choice = getattr(settings, "SEARCH_EMBEDDING_PROVIDER", "gemini")
+        try:
+            provider_class = PROVIDERS[choice] if choice in PROVIDERS else import_string(choice)
+        except ImportError as e:
+            raise ImproperlyConfigured(f"Unknown SEARCH_EMBEDDING_PROVIDER {choice!r}: {e}")
+        # The vector width is fixed by the SearchIndexEntry.embedding column (768),
+        # not configurable: search_services rejects providers that differ
+        _provider = provider_class()
+    return _provider
+
 
-def generate_embedding(text: str) -> List[float] | None: # Changed return type
+def generate_embedding(text: str) -> List[float] | None:
     """
-    Replace this with a real embedding provider (OpenAI, HuggingFace, local model).
-    Currently returns a deterministic vector for testing.
+    Embeds `text` with the configured provider.
     """
     if not text:
         return None # Return None instead of an empty list, it's safer for the DB
 
-    # --- THIS IS THE FIX ---
-    # Change the default dimension from 384 to 768
-    dim = int(os.environ.get("EMBED_DIM", 768)) 
-    # --- END OF FIX ---
-    
-    # cheap deterministic pseudo-embedding
-    seed = int(hashlib.md5(text.encode()).hexdigest(), 16)
-    return [float((seed * (i + 1)) % 1000) / 1000.0 for i in range(dim)]
\ No newline at end of file
+    return get_embedding_provider().embed(text, task_type="retrieval_query")
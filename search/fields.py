@@ -0,0 +1,15 @@
+# search/fields.py
+from django.db import models
+
+
+class PostgresGeneratedField(models.GeneratedField):
+    """
+    A GeneratedField whose expression only compiles on PostgreSQL (e.g. a
+    tsvector built with SearchVector). Other databases get a column that is
+    always NULL, so the table can still be created and rebuilt there.
+    """
+
+    def generated_sql(self, connection):
+        if connection.vendor != "postgresql":
+            return "NULL", ()
+        return super().generated_sql(connection)
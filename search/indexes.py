@@ -0,0 +1,25 @@
+# search/indexes.py
+from django.contrib.postgres.indexes import GinIndex
+from pgvector.django import HnswIndex
+
+
+class PostgresIndexMixin:
+    """
+    Index types that only exist on PostgreSQL (GIN, HNSW) become a plain
+    B-tree index on the same fields elsewhere, so the schema (and SQLite's
+    table rebuilds, which re-create every index) work on SQLite too.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            fields = [model._meta.get_field(field_name) for field_name, _ in self.fields_orders]
+            return schema_editor._create_index_sql(model, fields=fields, name=self.name)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+class PortableGinIndex(PostgresIndexMixin, GinIndex):
+    pass
+
+
+class PortableHnswIndex(PostgresIndexMixin, HnswIndex):
+    pass
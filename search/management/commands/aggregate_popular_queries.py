@@ -0,0 +1,54 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+from search.models import PopularQuery, QueryLog
+from search.services.suggest_services import MIN_PREFIX_LENGTH, normalize_query
+
+class Command(BaseCommand):
+    help = 'Rebuilds the PopularQuery table (autocomplete) from recent QueryLog rows that returned results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Look back this many days of query logs.')
+        parser.add_argument('--min-count', type=int, default=3,
+                            help='Ignore queries searched fewer times (typos, one-offs, personal data).')
+        parser.add_argument('--limit', type=int, default=5000, help='Keep at most this many queries.')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+        rows = (
+            QueryLog.objects.filter(timestamp__gte=since, results_found__gt=0)
+            .annotate(normalized=Trim(Lower('query_text')))
+            .values('normalized')
+            .annotate(count=Count('id'), last=Max('timestamp'))
+        )
+
+        # Whitespace inside the query is collapsed here, so merge in Python
+        totals = {}
+        for row in rows.iterator(chunk_size=2000):
+            query = normalize_query(row['normalized'])
+            if len(query) < MIN_PREFIX_LENGTH:
+                continue
+            count, last = totals.get(query, (0, row['last']))
+            totals[query] = (count + row['count'], max(last, row['last']))
+
+        popular = sorted(
+            ((query, count, last) for query, (count, last) in totals.items() if count >= options['min_count']),
+            key=lambda item: -item[1],
+        )[:options['limit']]
+
+        with transaction.atomic():
+            PopularQuery.objects.bulk_create(
+                [PopularQuery(query=query, search_count=count, last_searched_at=last) for query, count, last in popular],
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['query'],
+                update_fields=['search_count', 'last_searched_at'],
+            )
+            stale, _ = PopularQuery.objects.exclude(query__in=[query for query, _, _ in popular]).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(popular)} popular queries stored, {stale} stale removed."
+        ))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from search.repositories.vector_index import vector_index
+
+class Command(BaseCommand):
+    help = 'Writes a snapshot of the in-memory vector index that workers can memory-map at startup'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=getattr(settings, 'SEARCH_VECTOR_INDEX_PATH', None),
+            help='Snapshot path prefix (defaults to SEARCH_VECTOR_INDEX_PATH).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not path:
+            raise CommandError("Pass --path or set SEARCH_VECTOR_INDEX_PATH")
+
+        vector_index.load_from_db()
+        vector_index.save(path)
+        self.stdout.write(self.style.SUCCESS(f"Saved {len(vector_index)} vectors to {path}.*.npy"))
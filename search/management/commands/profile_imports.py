@@ -0,0 +1,80 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a web worker imports: the WSGI app at boot, the URLconf (and every
+# view behind it) on its first request
+DEFAULT_MODULES = ["teseapp.wsgi", "teseapp.urls"]
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = ('Imports the app in a fresh interpreter with `python -X importtime` and reports the '
+            'slowest imports and the total import time')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module', action='append', dest='modules', metavar='DOTTED.PATH',
+            help=f'Module to import (repeatable). Defaults to {", ".join(DEFAULT_MODULES)}.'
+        )
+        parser.add_argument('--top', type=int, default=20, help='Number of imports listed.')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this JSON file.')
+        parser.add_argument(
+            '--fail-over-ms', type=float, default=None,
+            help='Exit with an error when the total import time exceeds this (regression gate for CI).'
+        )
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'teseapp.settings')}
+        # wsgi runs django.setup(); anything else needs it first
+        code = "import django; django.setup()\n" + "\n".join(f"import {module}" for module in modules)
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(f"Importing {', '.join(modules)} failed:\n{process.stderr[-2000:]}")
+
+        imports = []
+        for line in process.stderr.splitlines():
+            match = LINE_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                imports.append({
+                    "module": name,
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                    "depth": len(indent) // 2,
+                })
+        total_ms = sum(item["cumulative_ms"] for item in imports if item["depth"] == 0)
+
+        # Top-level packages by cumulative time answer "which dependency is slow";
+        # self time finds the individual modules doing work at import
+        by_cumulative = sorted((item for item in imports if item["depth"] == 0),
+                               key=lambda item: -item["cumulative_ms"])[:options['top']]
+        by_self = sorted(imports, key=lambda item: -item["self_ms"])[:options['top']]
+
+        self.stdout.write(f"Total import time: {total_ms:.0f}ms ({len(imports)} modules)")
+        self.stdout.write("Slowest top-level imports (cumulative):")
+        for item in by_cumulative:
+            self.stdout.write(f"  {item['cumulative_ms']:9.1f}ms  {item['module']}")
+        self.stdout.write("Slowest modules (self):")
+        for item in by_self:
+            self.stdout.write(f"  {item['self_ms']:9.1f}ms  {item['module']}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({
+                    "modules": modules,
+                    "total_ms": round(total_ms, 1),
+                    "by_cumulative": by_cumulative,
+                    "by_self": by_self,
+                }, f, indent=2)
+
+        if options['fail_over_ms'] is not None and total_ms > options['fail_over_ms']:
+            raise CommandError(f"Import time {total_ms:.0f}ms exceeds {options['fail_over_ms']:.0f}ms")
@@ -0,0 +1,76 @@
+import time
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from search.embeddings import reduce_embedding
+from search.models import REDUCED_DIMENSIONS, IndexJob, SearchIndexEntry
+from search.services.job_services import enqueue_job
+from search.services.search_services import EMBEDDING_MODEL, indexable_models, invalidate_results
+
+class Command(BaseCommand):
+    help = ('Migrates the index to the configured embedding model: queues a shadow rebuild for content '
+            'types with vectors of another model, and fills the 256-d Matryoshka column in batches')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', metavar='APP_LABEL.MODEL',
+            help='Only migrate this model (repeatable). Defaults to every indexable model.'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Entries updated per statement.')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between batches (keeps I/O and WAL bursts small).')
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Only fill embedding_256; do not queue rebuilds for stale models.')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = indexable_models()
+
+        for model in models:
+            content_type = ContentType.objects.get_for_model(model)
+            entries = SearchIndexEntry.objects.filter(content_type=content_type)
+
+            # 1. Vectors of another (or an unknown) model: re-embed everything into a
+            # shadow generation. Searches keep comparing only EMBEDDING_MODEL vectors
+            # and the rebuilt generation replaces the old one atomically.
+            stale = entries.live().exclude(embedding_model=EMBEDDING_MODEL).count()
+            if stale and not options['no_rebuild']:
+                pending = IndexJob.objects.filter(
+                    kind=IndexJob.KIND_REBUILD, content_type=content_type,
+                    status__in=[IndexJob.STATUS_QUEUED, IndexJob.STATUS_RUNNING],
+                ).first()
+                if pending is None:
+                    pending = enqueue_job(IndexJob.KIND_REBUILD, model)
+                self.stdout.write(
+                    f"{model._meta.label}: {stale} entries not embedded with {EMBEDDING_MODEL}, "
+                    f"rebuild job {pending.pk} will re-embed them"
+                )
+
+            # 2. Matryoshka column for vectors of the current model (no provider calls)
+            filled = self._fill_reduced(entries, options['batch_size'], options['sleep'])
+            if filled:
+                invalidate_results([content_type.id])
+            self.stdout.write(f"{model._meta.label}: {filled} entries got a {REDUCED_DIMENSIONS}-d vector")
+
+        self.stdout.write(self.style.SUCCESS("Re-embedding scheduled!"))
+
+    def _fill_reduced(self, entries, batch_size, sleep):
+        missing = entries.filter(embedding_model=EMBEDDING_MODEL, embedding_256=None).exclude(embedding=None)
+        filled = 0
+        after_pk = 0
+        while True:
+            batch = list(missing.filter(pk__gt=after_pk).order_by('pk').only('pk', 'embedding')[:batch_size])
+            if not batch:
+                return filled
+            for entry in batch:
+                entry.embedding_256 = reduce_embedding(entry.embedding, REDUCED_DIMENSIONS)
+            SearchIndexEntry.objects.bulk_update(batch, ['embedding_256'])
+            filled += len(batch)
+            after_pk = batch[-1].pk
+            if sleep:
+                time.sleep(sleep)
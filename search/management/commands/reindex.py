@@ -1,31 +1,112 @@
+import json
+import os
 import time
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
 from products.models import Listing  # Adjust import based on your app name
-from search.services.search_services import index_object
+from search.services.rate_limiter import TokenBucket
+from search.services.search_services import (
+    MAX_EMBED_BATCH_SIZE, embedding_provider, index_objects, iter_chunks, source_queryset,
+)
+
+DEFAULT_CHECKPOINT = os.path.join(settings.BASE_DIR, ".reindex_checkpoint.json")
+MAX_RETRIES = 5
 
 class Command(BaseCommand):
     help = 'Rebuilds the semantic search index for Listings'
 
-    def handle(self, *args, **kwargs):
-        listings = Listing.objects.all()
-        total = listings.count()
-        
-        self.stdout.write(f"Found {total} listings to index...")
-
-        for i, listing in enumerate(listings, 1):
-            try:
-                self.stdout.write(f"Indexing [{i}/{total}]: {listing.name}...", ending='')
-                
-                # Call the service we wrote earlier
-                index_object(listing)
-                
-                self.stdout.write(self.style.SUCCESS("OK"))
-
-                # CRITICAL: SLEEP TO RESPECT GEMINI FREE TIER
-                # 15 requests per minute = 1 request every 4 seconds
-                time.sleep(4.1) 
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"FAILED: {e}"))
-
-        self.stdout.write(self.style.SUCCESS("Reindexing complete!"))
\ No newline at end of file
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'GEMINI_EMBED_BATCH_SIZE', MAX_EMBED_BATCH_SIZE),
+            help=f'Listings embedded per provider call (max {MAX_EMBED_BATCH_SIZE}).'
+        )
+        parser.add_argument(
+            '--checkpoint', default=DEFAULT_CHECKPOINT,
+            help='File used to resume an interrupted rebuild.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore any existing checkpoint and start from the first listing.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, min(options['batch_size'], MAX_EMBED_BATCH_SIZE))
+        checkpoint_path = options['checkpoint']
+
+        # CRITICAL: RESPECT GEMINI QUOTAS
+        # One token per batch call, plus (optionally) one per embedded document.
+        # Local providers (e.g. "hashing") run at full speed.
+        request_bucket = doc_bucket = None
+        if embedding_provider.is_remote:
+            request_bucket = TokenBucket(getattr(settings, 'GEMINI_EMBED_RPM', 15), capacity=1)
+            docs_per_minute = getattr(settings, 'GEMINI_EMBED_DOCS_PER_MINUTE', 0)
+            doc_bucket = TokenBucket(docs_per_minute, capacity=batch_size) if docs_per_minute else None
+
+        checkpoint = {} if options['restart'] else self._load_checkpoint(checkpoint_path)
+        last_pk = checkpoint.get('last_pk', 0)
+        indexed = checkpoint.get('indexed', 0)
+
+        total = Listing.objects.count()
+        remaining = Listing.objects.filter(pk__gt=last_pk).count()
+        if last_pk:
+            self.stdout.write(f"Resuming after listing #{last_pk} ({indexed} already indexed)...")
+        self.stdout.write(f"Found {total} listings, {remaining} left to index in batches of {batch_size}...")
+
+        # Users joined and images prefetched: a constant number of queries per batch
+        for batch in iter_chunks(source_queryset(Listing), batch_size, after_pk=last_pk):
+            count = self._index_batch(batch, request_bucket, doc_bucket)
+            last_pk = batch[-1].pk
+            indexed += count
+            self._save_checkpoint(checkpoint_path, last_pk, indexed)
+            self.stdout.write(f"Indexed [{indexed}/{total}] up to listing #{last_pk} ", ending='')
+            self.stdout.write(self.style.SUCCESS("OK"))
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS("Reindexing complete!"))
+
+    def _index_batch(self, batch, request_bucket, doc_bucket):
+        for attempt in range(1, MAX_RETRIES + 1):
+            if request_bucket:
+                request_bucket.acquire()
+            if doc_bucket:
+                doc_bucket.acquire(len(batch))
+
+            count = index_objects(batch)
+            if count is not None:
+                return count
+
+            backoff = 2 ** attempt
+            self.stdout.write(self.style.WARNING(
+                f"Batch starting at listing #{batch[0].pk} failed (attempt {attempt}/{MAX_RETRIES}), "
+                f"retrying in {backoff}s"
+            ))
+            time.sleep(backoff)
+
+        raise CommandError(
+            f"Giving up on batch starting at listing #{batch[0].pk}. "
+            "Re-run the command to resume from the last checkpoint."
+        )
+
+    def _load_checkpoint(self, path):
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.stdout.write(self.style.WARNING(f"Ignoring unreadable checkpoint {path}: {e}"))
+            return {}
+
+    def _save_checkpoint(self, path, last_pk, indexed):
+        # Write to a temp file first so a crash never leaves a truncated checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'last_pk': last_pk,
+                'indexed': indexed,
+                'updated_at': timezone.now().isoformat(),
+            }, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,273 @@
+import json
+import subprocess
+import time
+import numpy as np
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from search.embeddings import reduce_embedding
+from search.models import REDUCED_DIMENSIONS, SearchIndexEntry
+from search.repositories.search_repository import _portable_search
+from search.services.search_services import MAX_EF_SEARCH, RERANK_CANDIDATES, _set_ann_params
+
+# Corpus rows use a generation that is never active, under the content type of
+# SearchIndexEntry itself (not indexable): live() and the API never see them
+BENCHMARK_GENERATION = 2_000_000_000
+# Bumped whenever the seeded columns change, so stale corpora are recreated
+CORPUS_FORMAT = 2
+DIMENSIONS = 768
+SEED_BATCH_SIZE = 2000
+CLUSTERS = 100
+CATEGORIES = 20
+WORDS = (
+    "organic", "fresh", "vintage", "wireless", "leather", "wooden", "smart", "compact",
+    "tomato", "bicycle", "phone", "chair", "lamp", "jacket", "camera", "kettle",
+)
+WORKLOADS = ("exact", "ann", "ann_half", "ann_reduced", "filtered", "portable")
+
+
+class Command(BaseCommand):
+    help = ('Seeds a deterministic synthetic SearchIndexEntry corpus and reports latency '
+            '(p50/p95/p99), throughput and recall@k of the search query shapes as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=10000, help='Corpus size (10k to 1M entries).')
+        parser.add_argument('--seed', type=int, default=42, help='Seed of the corpus and query vectors.')
+        parser.add_argument('--queries', type=int, default=100, help='Measured queries per workload.')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured queries run first per workload.')
+        parser.add_argument('-k', type=int, default=10, help='Results per query (recall@k).')
+        parser.add_argument('--ef-search', type=int, default=100)
+        parser.add_argument('--candidates', type=int, default=RERANK_CANDIDATES,
+                            help='Half-precision / 256-d candidates re-ranked at full precision.')
+        parser.add_argument('--workload', action='append', dest='workloads', choices=WORKLOADS,
+                            help='Only run this workload (repeatable). Defaults to all.')
+        parser.add_argument('--output', default='search-benchmark.json', help='Where to write the JSON report.')
+        parser.add_argument('--reseed', action='store_true', help='Recreate the corpus even if it matches.')
+        parser.add_argument('--drop', action='store_true', help='Delete the corpus after the run.')
+
+    def handle(self, *args, **options):
+        postgres = connection.vendor == 'postgresql'
+        workloads = options['workloads'] or list(WORKLOADS)
+        if not postgres:
+            # The vector workloads need pgvector; the portable path is what sqlite runs
+            workloads = [name for name in workloads if name == 'portable']
+            if not workloads:
+                raise CommandError("Vector workloads need Postgres with pgvector")
+
+        k = options['k']
+        self.content_type = ContentType.objects.get_for_model(SearchIndexEntry)
+        self._seed(options['size'], options['seed'], options['reseed'])
+        queries = self._query_vectors(options['queries'] + options['warmup'], options['seed'])
+        texts = [WORDS[i % len(WORDS)] for i in range(len(queries))]
+        categories = [f"cat-{i % CATEGORIES}" for i in range(len(queries))]
+
+        # Ground truth for recall@k: the exact (sequential) scan
+        truth = filtered_truth = None
+        if postgres and set(workloads) & {"exact", "ann", "ann_half", "ann_reduced"}:
+            truth = [self._exact_ids(vector, k) for vector in queries]
+        if postgres and "filtered" in workloads:
+            filtered_truth = [self._exact_ids(vector, k, category) for vector, category in zip(queries, categories)]
+
+        ef_search = min(max(options['ef_search'], k), MAX_EF_SEARCH)
+        candidates = max(options['candidates'], k)
+        runs = {
+            "exact": (lambda i: self._exact_ids(queries[i], k), truth),
+            "ann": (lambda i: self._ann_ids(queries[i], k, ef_search), truth),
+            "ann_half": (lambda i: self._half_ids(queries[i], k, candidates, ef_search), truth),
+            "ann_reduced": (lambda i: self._reduced_ids(queries[i], k, candidates, ef_search), truth),
+            "filtered": (lambda i: self._ann_ids(queries[i], k, ef_search, categories[i]), filtered_truth),
+            "portable": (lambda i: self._portable_ids(texts[i], k, categories[i]), None),
+        }
+
+        report = {
+            "meta": {
+                "commit": self._git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "vendor": connection.vendor,
+                "size": options['size'],
+                "seed": options['seed'],
+                "queries": options['queries'],
+                "k": k,
+                "ef_search": ef_search,
+                "candidates": candidates,
+            },
+            "workloads": {},
+        }
+        for name in workloads:
+            run, expected = runs[name]
+            result = self._measure(run, len(queries), options['warmup'], expected)
+            report["workloads"][name] = result
+            recall = "-" if result["recall_at_k"] is None else f"{result['recall_at_k']:.3f}"
+            self.stdout.write(
+                f"{name:<9} p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms "
+                f"p99={result['p99_ms']:.2f}ms qps={result['qps']:.1f} recall@{k}={recall}"
+            )
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['drop']:
+            self._drop()
+
+    # --- corpus ---
+
+    def _corpus(self):
+        return SearchIndexEntry.objects.filter(content_type=self.content_type, generation=BENCHMARK_GENERATION)
+
+    def _centroids(self, seed):
+        return np.random.default_rng([seed, 0]).standard_normal((CLUSTERS, DIMENSIONS))
+
+    @staticmethod
+    def _normalize(vectors):
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    @staticmethod
+    def _title(rng, i):
+        words = rng.choice(WORDS, size=3)
+        return f"{' '.join(words)} {i}"
+
+    def _seed(self, size, seed, reseed):
+        corpus = self._corpus()
+        first = corpus.filter(object_id=1).values_list('metadata', flat=True).first()
+        if (not reseed and first and first.get('benchmark_seed') == seed
+                and first.get('benchmark_format') == CORPUS_FORMAT and corpus.count() == size):
+            self.stdout.write(f"Reusing the {size}-entry corpus (seed {seed})")
+            return
+        self._drop()
+
+        # Clustered vectors (centroid + noise), so ANN recall behaves like real data.
+        # Each batch has its own RNG stream: the corpus only depends on (size, seed).
+        centroids = self._centroids(seed)
+        started = time.perf_counter()
+        for start in range(0, size, SEED_BATCH_SIZE):
+            rng = np.random.default_rng([seed, 2, start])
+            count = min(SEED_BATCH_SIZE, size - start)
+            clusters = rng.integers(0, CLUSTERS, size=count)
+            vectors = self._normalize(centroids[clusters] + 0.5 * rng.standard_normal((count, DIMENSIONS)))
+            entries = []
+            for offset, (cluster, vector) in enumerate(zip(clusters, vectors)):
+                object_id = start + offset + 1
+                entries.append(SearchIndexEntry(
+                    content_type=self.content_type,
+                    object_id=object_id,
+                    generation=BENCHMARK_GENERATION,
+                    title=self._title(rng, object_id),
+                    description="",
+                    metadata={"benchmark_seed": seed, "benchmark_format": CORPUS_FORMAT},
+                    embedding=vector,
+                    embedding_half=vector,
+                    embedding_256=reduce_embedding(vector, REDUCED_DIMENSIONS),
+                    category=f"cat-{cluster % CATEGORIES}",
+                    status="inactive" if object_id % 10 == 0 else "active",
+                    price=int(rng.integers(1, 1000)),
+                ))
+            SearchIndexEntry.objects.bulk_create(entries)
+            self.stdout.write(f"Seeded {start + count}/{size}", ending="\r")
+        self.stdout.write(f"Seeded {size} entries in {time.perf_counter() - started:.0f}s")
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(SearchIndexEntry._meta.db_table)}")
+
+    def _query_vectors(self, count, seed):
+        # Near the corpus clusters but not corpus members
+        rng = np.random.default_rng([seed, 1])
+        centroids = self._centroids(seed)
+        clusters = rng.integers(0, CLUSTERS, size=count)
+        return list(self._normalize(centroids[clusters] + 0.5 * rng.standard_normal((count, DIMENSIONS))))
+
+    def _drop(self):
+        corpus = self._corpus()
+        while True:
+            ids = list(corpus.values_list('id', flat=True)[:10000])
+            if not ids:
+                return
+            SearchIndexEntry.objects.filter(id__in=ids).delete()
+
+    # --- workloads (same query shapes as search_services / search_repository) ---
+
+    def _filtered(self, qs, category):
+        if category is not None:
+            qs = qs.filter(category=category, status="active")
+        return qs
+
+    def _exact_ids(self, vector, k, category=None):
+        from pgvector.django import CosineDistance
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('enable_indexscan', 'off', true)")
+            qs = self._filtered(self._corpus(), category).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _ann_ids(self, vector, k, ef_search, category=None):
+        from pgvector.django import CosineDistance
+
+        with transaction.atomic():
+            _set_ann_params(ef_search, 1)
+            qs = self._filtered(self._corpus(), category).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _half_ids(self, vector, k, candidates, ef_search):
+        from pgvector import HalfVector
+        from pgvector.django import CosineDistance
+
+        with transaction.atomic():
+            _set_ann_params(min(max(ef_search, candidates), MAX_EF_SEARCH), 1)
+            candidate_ids = self._corpus().order_by(
+                CosineDistance('embedding_half', HalfVector(vector))
+            ).values('id')[:candidates]
+            qs = SearchIndexEntry.objects.filter(id__in=candidate_ids).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _reduced_ids(self, vector, k, candidates, ef_search):
+        from pgvector.django import CosineDistance
+
+        with transaction.atomic():
+            _set_ann_params(min(max(ef_search, candidates), MAX_EF_SEARCH), 1)
+            candidate_ids = self._corpus().order_by(
+                CosineDistance('embedding_256', reduce_embedding(vector, REDUCED_DIMENSIONS))
+            ).values('id')[:candidates]
+            qs = SearchIndexEntry.objects.filter(id__in=candidate_ids).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _portable_ids(self, text, k, category):
+        qs = _portable_search(text, {"category": category}, base=self._corpus())
+        return list(qs.values_list('id', flat=True)[:k])
+
+    # --- reporting ---
+
+    def _measure(self, run, count, warmup, expected):
+        for i in range(min(warmup, count)):
+            run(i)
+        latencies = []
+        recall = []
+        started = time.perf_counter()
+        for i in range(warmup, count):
+            query_started = time.perf_counter()
+            ids = run(i)
+            latencies.append((time.perf_counter() - query_started) * 1000)
+            if expected is not None and expected[i]:
+                recall.append(len(set(expected[i]) & set(ids)) / len(expected[i]))
+        elapsed = time.perf_counter() - started
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies else (0.0, 0.0, 0.0)
+        return {
+            "queries": len(latencies),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(np.mean(latencies)), 3) if latencies else 0.0,
+            # Sequential, single connection
+            "qps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "recall_at_k": round(float(np.mean(recall)), 4) if recall else None,
+        }
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
@@ -0,0 +1,64 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from search.services.generation_services import collect_garbage
+from search.services.job_services import process_job_chunk
+from search.services.outbox_services import process_outbox_batch
+
+class Command(BaseCommand):
+    help = ('Drains the search indexing outbox, runs queued bulk-index / rebuild jobs and '
+            'garbage-collects retired index generations (run as a long-lived worker process)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Outbox rows claimed per batch.')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Failures before a row is dead-lettered.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--job-chunk-size', type=int, default=None,
+                            help='Objects per index job chunk (defaults to the embedding batch size).')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox and job queue once and exit.')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Search worker started")
+
+        while True:
+            try:
+                processed = process_outbox_batch(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts'],
+                )
+            except Exception as e:
+                # e.g. the database went away: reconnect on the next iteration
+                self.stdout.write(self.style.ERROR(f"Outbox batch failed: {e}"))
+                close_old_connections()
+                processed = 0
+            if processed:
+                self.stdout.write(f"Processed {processed} outbox rows")
+                continue
+
+            # Live edits first: jobs only advance one chunk while the outbox is empty
+            try:
+                processed = process_job_chunk(chunk_size=options['job_chunk_size'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Index job chunk failed: {e}"))
+                close_old_connections()
+                processed = 0
+            if processed:
+                self.stdout.write(f"Indexed {processed} objects for a queued job")
+                continue
+
+            # Idle: remove entries of retired index generations, a batch at a time
+            try:
+                processed = collect_garbage()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Index garbage collection failed: {e}"))
+                close_old_connections()
+                processed = 0
+            if processed:
+                self.stdout.write(f"Removed {processed} entries of retired index generations")
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS("Outbox drained"))
@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from search.services.rate_limiter import TokenBucket
+from search.services.search_services import MAX_EMBED_BATCH_SIZE, embedding_provider, indexable_models
+from search.services.sync_services import IndexSyncError, sync_model
+
+class Command(BaseCommand):
+    help = ('Incrementally syncs the search index with its source tables: re-indexes rows changed '
+            'since the last run, indexes missing rows and deletes orphaned entries')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', metavar='APP_LABEL.MODEL',
+            help='Only sync this model (repeatable). Defaults to every indexable model.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=MAX_EMBED_BATCH_SIZE,
+            help=f'Objects embedded per provider call (max {MAX_EMBED_BATCH_SIZE}).'
+        )
+        parser.add_argument('--full', action='store_true', help='Ignore the stored watermark and compare every row with its entry.')
+        parser.add_argument('--no-sweep', action='store_true', help='Do not delete orphaned entries.')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, min(options['batch_size'], MAX_EMBED_BATCH_SIZE))
+
+        if options['models']:
+            try:
+                models = [apps.get_model(label) for label in options['models']]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = indexable_models()
+
+        # Same Gemini quota as reindex: one token per batch call
+        before_batch = None
+        if embedding_provider.is_remote:
+            bucket = TokenBucket(getattr(settings, 'GEMINI_EMBED_RPM', 15), capacity=1)
+            before_batch = lambda count: bucket.acquire()
+
+        for model in models:
+            try:
+                result = sync_model(
+                    model,
+                    batch_size=batch_size,
+                    full=options['full'],
+                    sweep=not options['no_sweep'],
+                    before_batch=before_batch,
+                )
+            except IndexSyncError as e:
+                raise CommandError(f"{e}. Progress is saved; re-run the command to continue.")
+            self.stdout.write(
+                f"{model._meta.label}: {result['indexed']} indexed, {result['deleted']} orphans deleted"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Sync complete!"))
@@ -0,0 +1,103 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from pgvector import HalfVector
+from pgvector.django import CosineDistance
+from search.embeddings import reduce_embedding
+from search.models import REDUCED_DIMENSIONS, SearchIndexEntry
+from search.services.search_services import EMBEDDING_MODEL, RERANK_CANDIDATES, _set_ann_params
+
+INDEXES = ("search_entry_embedding_hnsw", "search_entry_emb_half_hnsw", "search_entry_emb256_hnsw")
+
+
+class Command(BaseCommand):
+    help = ('Compares recall and latency of full-precision vs half-precision and 256-d '
+            'Matryoshka (+ re-rank) vector search')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50, help='Indexed entries used as query vectors.')
+        parser.add_argument('-k', type=int, default=10, help='Results per query (recall@k).')
+        parser.add_argument('--ef-search', type=int, default=100)
+        parser.add_argument(
+            '--candidates', type=int, default=RERANK_CANDIDATES,
+            help='Half-precision / reduced candidates re-ranked at full precision.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The recall report needs Postgres with pgvector")
+
+        k = options['k']
+        candidates = max(options['candidates'], k)
+        queries = list(
+            self._entries().exclude(embedding_half=None).exclude(embedding_256=None)
+            .order_by('?').values_list('embedding', flat=True)[:options['queries']]
+        )
+        if not queries:
+            raise CommandError("No entries with all embeddings; run migrations and reembed_index first")
+
+        runs = (('full', self._full_ids), ('half', self._half_ids), ('reduced', self._reduced_ids))
+        stats = {name: {'recall': 0.0, 'seconds': 0.0} for name, _ in runs}
+        for vector in queries:
+            exact = self._exact_ids(vector, k)
+            if not exact:
+                continue
+            for name, run in runs:
+                started = time.perf_counter()
+                ids = run(vector, k, candidates, options['ef_search'])
+                stats[name]['seconds'] += time.perf_counter() - started
+                stats[name]['recall'] += len(exact & set(ids)) / len(exact)
+
+        self.stdout.write(f"{len(queries)} queries, k={k}, ef_search={options['ef_search']}, "
+                          f"re-rank candidates={candidates}")
+        for name, values in stats.items():
+            self.stdout.write(
+                f"  {name:<7} recall@{k}={values['recall'] / len(queries):.3f}  "
+                f"avg latency={1000 * values['seconds'] / len(queries):.1f}ms"
+            )
+        for index, size in self._index_sizes().items():
+            self.stdout.write(f"  {index}: {size}")
+
+    def _entries(self):
+        # Entries of another model are never compared with this model's vectors
+        return SearchIndexEntry.objects.live().embedded_with(EMBEDDING_MODEL)
+
+    def _exact_ids(self, vector, k):
+        # Ground truth: a sequential scan, with the ANN indexes switched off
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('enable_indexscan', 'off', true)")
+            qs = self._entries().order_by(CosineDistance('embedding', vector))
+            return set(qs.values_list('id', flat=True)[:k])
+
+    def _full_ids(self, vector, k, candidates, ef_search):
+        with transaction.atomic():
+            _set_ann_params(max(ef_search, k), 1)
+            qs = self._entries().order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _half_ids(self, vector, k, candidates, ef_search):
+        with transaction.atomic():
+            _set_ann_params(max(ef_search, candidates), 1)
+            candidate_ids = self._entries().order_by(
+                CosineDistance('embedding_half', HalfVector(vector))
+            ).values('id')[:candidates]
+            qs = SearchIndexEntry.objects.filter(id__in=candidate_ids).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _reduced_ids(self, vector, k, candidates, ef_search):
+        with transaction.atomic():
+            _set_ann_params(max(ef_search, candidates), 1)
+            candidate_ids = self._entries().order_by(
+                CosineDistance('embedding_256', reduce_embedding(vector, REDUCED_DIMENSIONS))
+            ).values('id')[:candidates]
+            qs = SearchIndexEntry.objects.filter(id__in=candidate_ids).order_by(CosineDistance('embedding', vector))
+            return list(qs.values_list('id', flat=True)[:k])
+
+    def _index_sizes(self):
+        sizes = {}
+        with connection.cursor() as cursor:
+            for index in INDEXES:
+                cursor.execute("SELECT pg_size_pretty(pg_relation_size(to_regclass(%s)))", [index])
+                row = cursor.fetchone()
+                sizes[index] = row[0] if row and row[0] else "missing"
+        return sizes
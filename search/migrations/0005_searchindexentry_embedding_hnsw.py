@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:05
+
+from django.db import migrations
+
+import search.indexes
+from search.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps the
+    # table writable while the (slow) HNSW build runs.
+    atomic = False
+
+    dependencies = [
+        ("search", "0004_indexoutbox"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=search.indexes.PortableHnswIndex(
+                ef_construction=64,
+                fields=["embedding"],
+                m=16,
+                name="search_entry_embedding_hnsw",
+                opclasses=["vector_cosine_ops"],
+            ),
+        ),
+    ]
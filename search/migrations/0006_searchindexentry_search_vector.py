@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:31
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+import search.fields
+import search.indexes
+from search.migration_operations import AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("search", "0005_searchindexentry_embedding_hnsw"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="search_vector",
+            field=search.fields.PostgresGeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector(
+                        "title", config="english", weight="A"
+                    ),
+                    "||",
+                    django.contrib.postgres.search.SearchVector(
+                        "description", config="english", weight="B"
+                    ),
+                    django.contrib.postgres.search.SearchConfig("english"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=search.indexes.PortableGinIndex(
+                fields=["search_vector"], name="search_entry_search_vector_gin"
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:20
+
+import pgvector.django.halfvec
+from django.db import migrations
+
+import search.indexes
+from search.migration_operations import AddIndexConcurrentlyOnPostgres, PostgresOnly
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("search", "0006_searchindexentry_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="embedding_half",
+            field=pgvector.django.halfvec.HalfVectorField(
+                blank=True, dimensions=768, null=True
+            ),
+        ),
+        PostgresOnly(
+            migrations.RunSQL(
+                sql=(
+                    "UPDATE search_searchindexentry "
+                    "SET embedding_half = embedding::halfvec(768) "
+                    "WHERE embedding IS NOT NULL"
+                ),
+                reverse_sql=migrations.RunSQL.noop,
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=search.indexes.PortableHnswIndex(
+                ef_construction=64,
+                fields=["embedding_half"],
+                m=16,
+                name="search_entry_emb_half_hnsw",
+                opclasses=["halfvec_cosine_ops"],
+            ),
+        ),
+    ]
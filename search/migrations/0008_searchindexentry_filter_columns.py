@@ -0,0 +1,122 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:05
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+from search.migration_operations import AddIndexConcurrentlyOnPostgres
+
+BATCH_SIZE = 1000
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def backfill_filter_columns(apps, schema_editor):
+    SearchIndexEntry = apps.get_model("search", "SearchIndexEntry")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Listing = apps.get_model("products", "Listing")
+
+    listing_type_id = (
+        ContentType.objects.filter(app_label="products", model="listing").values_list("id", flat=True).first()
+    )
+
+    last_pk = 0
+    while True:
+        entries = list(SearchIndexEntry.objects.filter(pk__gt=last_pk).order_by("pk")[:BATCH_SIZE])
+        if not entries:
+            break
+        last_pk = entries[-1].pk
+
+        # listing_type was not part of the indexed document before this migration
+        listing_types = dict(
+            Listing.objects.filter(
+                pk__in=[e.object_id for e in entries if e.content_type_id == listing_type_id]
+            ).values_list("pk", "listing_type")
+        )
+
+        for entry in entries:
+            metadata = entry.metadata or {}
+            entry.category = (metadata.get("category") or "")[:100]
+            entry.status = (metadata.get("status") or "")[:20]
+            price = metadata.get("price")
+            entry.price = _decimal(price) if price not in (None, "") else None
+            entry.seller_id = _int(metadata.get("sellerId"))
+            entry.listing_type = metadata.get("listing_type") or (
+                listing_types.get(entry.object_id, "") if entry.content_type_id == listing_type_id else ""
+            )
+
+        SearchIndexEntry.objects.bulk_update(
+            entries, ["category", "status", "price", "listing_type", "seller_id"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("products", "0003_alter_listing_organic"),
+        ("search", "0007_searchindexentry_embedding_half"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="category",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="status",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="price",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="listing_type",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="seller_id",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_filter_columns, migrations.RunPython.noop),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(fields=["category"], name="search_entry_category_idx"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(fields=["status"], name="search_entry_status_idx"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(fields=["price"], name="search_entry_price_idx"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(fields=["listing_type"], name="search_entry_listing_type_idx"),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(fields=["seller_id"], name="search_entry_seller_id_idx"),
+        ),
+    ]
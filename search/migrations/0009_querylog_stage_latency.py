@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0008_searchindexentry_filter_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="querylog",
+            name="db_latency_ms",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="querylog",
+            name="embedding_latency_ms",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
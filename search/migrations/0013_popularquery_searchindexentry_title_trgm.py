@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-17 15:20
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+import search.indexes
+from search.migration_operations import AddIndexConcurrentlyOnPostgres, PostgresOnly
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("search", "0012_indexsyncstate"),
+    ]
+
+    operations = [
+        # CreateExtension skips other databases going forwards, but not when reversed
+        PostgresOnly(TrigramExtension()),
+        migrations.CreateModel(
+            name="PopularQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("query", models.CharField(max_length=200, unique=True)),
+                ("search_count", models.PositiveIntegerField(default=0)),
+                ("last_searched_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-search_count"], name="search_popular_count_idx"
+                    )
+                ],
+            },
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=search.indexes.PortableGinIndex(
+                fields=["title"],
+                name="search_entry_title_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
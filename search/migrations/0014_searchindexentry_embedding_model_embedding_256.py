@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-17 16:05
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+import search.indexes
+from search.migration_operations import AddIndexConcurrentlyOnPostgres, PostgresOnly
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("search", "0013_popularquery_searchindexentry_title_trgm"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="embedding_model",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="searchindexentry",
+            name="embedding_256",
+            field=pgvector.django.vector.VectorField(
+                blank=True, dimensions=256, null=True
+            ),
+        ),
+        # content_hash is the EmbeddingCache key of the entry's vector, and that
+        # row records the model. Vectors without a cache row predate the model
+        # switch, so they came from the only model used until then (Gemini);
+        # leaving them "" would hide them from vector search until a rebuild.
+        PostgresOnly(
+            migrations.RunSQL(
+                sql=[
+                    "UPDATE search_searchindexentry AS entry "
+                    "SET embedding_model = cache.model_name "
+                    "FROM search_embeddingcache AS cache "
+                    "WHERE cache.content_hash = entry.content_hash "
+                    "AND entry.embedding IS NOT NULL",
+                    "UPDATE search_searchindexentry "
+                    "SET embedding_model = 'models/text-embedding-004' "
+                    "WHERE embedding IS NOT NULL AND embedding_model = ''",
+                ],
+                reverse_sql=migrations.RunSQL.noop,
+            ),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=models.Index(
+                fields=["embedding_model"], name="search_entry_emb_model_idx"
+            ),
+        ),
+        # embedding_256 is filled by `manage.py reembed_index` (batched, off
+        # the deploy path) and then indexed here as rows arrive
+        AddIndexConcurrentlyOnPostgres(
+            model_name="searchindexentry",
+            index=search.indexes.PortableHnswIndex(
+                ef_construction=64,
+                fields=["embedding_256"],
+                m=16,
+                name="search_entry_emb256_hnsw",
+                opclasses=["vector_cosine_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0014_searchindexentry_embedding_model_embedding_256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexjob",
+            name="leased_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,116 @@
 # search/models.py
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
-from pgvector.django import VectorField
+from django.utils import timezone
+from pgvector.django import HalfVectorField, VectorField
+from .fields import PostgresGeneratedField
+from .indexes import PortableGinIndex, PortableHnswIndex
 from django.conf import settings
+from django.core.cache import caches
+
+ACTIVE_GENERATIONS_CACHE_KEY = "search:generations"
+# Short TTL as a safety net for caches that are not shared (LocMem): a
+# process may read a swapped-out generation for this long
+ACTIVE_GENERATIONS_CACHE_TTL = 30
+# Matryoshka-truncated copy of `embedding` (see embeddings.reduce_embedding)
+REDUCED_DIMENSIONS = 256
+
+
+class IndexGenerationManager(models.Manager):
+    def pointers(self):
+        """
+        ({content_type_id: active number}, {content_type_id: [building numbers]}),
+        kept in the shared cache and dropped on every change. Content types
+        without an active row use generation 0.
+        """
+        cache = caches[getattr(settings, "SEARCH_QUERY_CACHE_ALIAS", "default")]
+        try:
+            value = cache.get(ACTIVE_GENERATIONS_CACHE_KEY)
+        except Exception:
+            value = None
+        if value is None:
+            active, building = {}, {}
+            for content_type_id, number, state in self.exclude(state=IndexGeneration.STATE_RETIRED).values_list(
+                "content_type_id", "number", "state"
+            ):
+                if state == IndexGeneration.STATE_ACTIVE:
+                    active[content_type_id] = number
+                else:
+                    building.setdefault(content_type_id, []).append(number)
+            value = (active, building)
+            try:
+                cache.set(ACTIVE_GENERATIONS_CACHE_KEY, value, ACTIVE_GENERATIONS_CACHE_TTL)
+            except Exception:
+                pass
+        return value
+
+    def active_map(self):
+        return self.pointers()[0]
+
+    def clear_cache(self):
+        try:
+            caches[getattr(settings, "SEARCH_QUERY_CACHE_ALIAS", "default")].delete(ACTIVE_GENERATIONS_CACHE_KEY)
+        except Exception:
+            pass
+
+
+class IndexGeneration(models.Model):
+    """
+    A version of the index of one content type. Rebuilds write a new
+    "building" generation next to the active one and promote it with an
+    atomic swap; the previous one is retired and garbage-collected.
+    Entries of content types without any generation row belong to generation 0.
+    """
+    STATE_BUILDING = "building"
+    STATE_ACTIVE = "active"
+    STATE_RETIRED = "retired"
+    STATE_CHOICES = [
+        (STATE_BUILDING, "Building"),
+        (STATE_ACTIVE, "Active"),
+        (STATE_RETIRED, "Retired"),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_BUILDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+    retired_at = models.DateTimeField(null=True, blank=True)
+
+    objects = IndexGenerationManager()
+
+    class Meta:
+        unique_together = ("content_type", "number")
+        constraints = [
+            # The pointer: at most one active generation per content type
+            models.UniqueConstraint(
+                fields=["content_type"],
+                condition=models.Q(state="active"),
+                name="search_generation_one_active",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type_id} generation {self.number} ({self.state})"
+
+
+class SearchIndexEntryQuerySet(models.QuerySet):
+    def live(self):
+        """Entries of the active generation of their content type (no shadow or retired rows)."""
+        explicit = {ct: number for ct, number in IndexGeneration.objects.active_map().items() if number}
+        live = models.Q(generation=0)
+        if explicit:
+            live &= ~models.Q(content_type_id__in=list(explicit))
+        for content_type_id, number in explicit.items():
+            live |= models.Q(content_type_id=content_type_id, generation=number)
+        return self.filter(live)
+
+    def embedded_with(self, model_name):
+        """Entries whose vectors were produced by `model_name`: the only ones comparable to its query vectors."""
+        return self.filter(embedding_model=model_name)
+
 
 class SearchIndexEntry(models.Model):
     """
@@ -13,24 +120,251 @@ class SearchIndexEntry(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey("content_type", "object_id")
+    # Index generation (see IndexGeneration); searches only read live() entries
+    generation = models.PositiveIntegerField(default=0)
 
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     metadata = models.JSONField(default=dict, blank=True)
     embedding = VectorField(dimensions=768, null=True, blank=True)
+    # Same vector in half precision, with its own HNSW index used for candidate
+    # generation when SEARCH_VECTOR_STORAGE = "half" (re-ranked with `embedding`).
+    # It is kept next to the float32 index, so disk usage grows.
+    embedding_half = HalfVectorField(dimensions=768, null=True, blank=True)
+    # First REDUCED_DIMENSIONS components of `embedding`, re-normalized, with its
+    # own (additional) HNSW index used for candidate generation when SEARCH_VECTOR_STORAGE = "reduced"
+    embedding_256 = VectorField(dimensions=REDUCED_DIMENSIONS, null=True, blank=True)
+    # Embedding model (provider name) that produced the vectors; empty if unknown
+    embedding_model = models.CharField(max_length=100, blank=True, default="")
+    # Hash of the text that produced `embedding` (see search_services.embedding_hash)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    # Hot filter keys copied out of `metadata` into typed, indexed columns
+    # (see FILTER_FIELDS), so filters are served by btree indexes instead of
+    # being evaluated on the JSON document of every candidate row
+    category = models.CharField(max_length=100, blank=True, default="")
+    status = models.CharField(max_length=20, blank=True, default="")
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    listing_type = models.CharField(max_length=20, blank=True, default="")
+    seller_id = models.PositiveIntegerField(null=True, blank=True)
+    # Full-text document maintained by Postgres for the lexical search leg (NULL elsewhere)
+    search_vector = PostgresGeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config="english")
+            + SearchVector("description", weight="B", config="english")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # to_search_document() key -> filter column
+    FILTER_FIELDS = {
+        "category": "category",
+        "status": "status",
+        "price": "price",
+        "listing_type": "listing_type",
+        "sellerId": "seller_id",
+    }
+
+    objects = SearchIndexEntryQuerySet.as_manager()
+
     class Meta:
-        unique_together = ("content_type", "object_id")
+        unique_together = ("content_type", "object_id", "generation")
         indexes = [
             models.Index(fields=["content_type", "object_id"]),
+            models.Index(fields=["content_type", "generation"], name="search_entry_generation_idx"),
+            models.Index(fields=["category"], name="search_entry_category_idx"),
+            models.Index(fields=["status"], name="search_entry_status_idx"),
+            models.Index(fields=["price"], name="search_entry_price_idx"),
+            models.Index(fields=["listing_type"], name="search_entry_listing_type_idx"),
+            models.Index(fields=["seller_id"], name="search_entry_seller_id_idx"),
+            models.Index(fields=["embedding_model"], name="search_entry_emb_model_idx"),
+            # Approximate nearest-neighbour index for CosineDistance ordering
+            PortableHnswIndex(
+                name="search_entry_embedding_hnsw",
+                fields=["embedding"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+            PortableHnswIndex(
+                name="search_entry_emb_half_hnsw",
+                fields=["embedding_half"],
+                m=16,
+                ef_construction=64,
+                opclasses=["halfvec_cosine_ops"],
+            ),
+            PortableHnswIndex(
+                name="search_entry_emb256_hnsw",
+                fields=["embedding_256"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+            PortableGinIndex(fields=["search_vector"], name="search_entry_search_vector_gin"),
+            # Autocomplete (word-prefix / fuzzy matches on titles, see suggest_services)
+            PortableGinIndex(fields=["title"], name="search_entry_title_trgm", opclasses=["gin_trgm_ops"]),
         ]
 
     def __str__(self):
         return f"{self.title} ({self.content_type})"
 
+    @classmethod
+    def filter_values(cls, document):
+        """Filter column values for a to_search_document() dict (missing keys -> empty)."""
+        values = {}
+        for key, field_name in cls.FILTER_FIELDS.items():
+            value = document.get(key)
+            field = cls._meta.get_field(field_name)
+            if value in (None, ""):
+                values[field_name] = None if field.null else ""
+            else:
+                values[field_name] = field.to_python(value)
+        return values
+
+
+class EmbeddingCache(models.Model):
+    """
+    Persistent cache of generated embeddings, keyed by a hash of the
+    model name, task type and embedded text.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=100)
+    task_type = models.CharField(max_length=50)
+    embedding = VectorField(dimensions=768)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model_name}/{self.task_type} {self.content_hash[:12]}"
+
+
+class IndexOutbox(models.Model):
+    """
+    Index work recorded once the writing transaction commits.
+    Drained in batches by `manage.py search_worker`; rows are deleted once
+    processed and marked as dead after too many failed attempts.
+    """
+    ACTION_INDEX = "index"
+    ACTION_DELETE = "delete"
+    ACTION_CHOICES = [
+        (ACTION_INDEX, "Index"),
+        (ACTION_DELETE, "Delete"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.content_type_id}:{self.object_id} ({self.status})"
+
+
+class IndexJob(models.Model):
+    """
+    A bulk-index or rebuild of one model, queued by the admin API and run
+    chunk by chunk by `manage.py search_worker`. `last_pk` makes it
+    resumable: a job interrupted by a restart continues where it stopped.
+    """
+    KIND_BULK = "bulk"
+    KIND_REBUILD = "rebuild"
+    KIND_CHOICES = [
+        (KIND_BULK, "Bulk index"),
+        (KIND_REBUILD, "Rebuild"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    # Bulk jobs may be limited to these primary keys (null = every object)
+    object_ids = models.JSONField(null=True, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    indexed = models.PositiveIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)
+    # Rebuilds write this (shadow) generation and promote it when done
+    generation = models.PositiveIntegerField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    # A worker processing a chunk (or a chunk that failed, until its retry
+    # delay passes) keeps other workers off the job until then
+    leased_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.content_type_id} #{self.pk} ({self.status})"
+
+
+class IndexSyncState(models.Model):
+    """
+    Progress of `manage.py sync_search_index` for one content type: source
+    rows updated after `watermark` have not been checked against the index yet.
+    """
+    content_type = models.OneToOneField(ContentType, on_delete=models.CASCADE)
+    watermark = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_indexed = models.PositiveIntegerField(default=0)
+    last_deleted = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"sync {self.content_type_id} @ {self.watermark}"
+
+
+class PopularQuery(models.Model):
+    """
+    Normalized queries that returned results, aggregated from QueryLog by
+    `manage.py aggregate_popular_queries`; feeds the suggest endpoint.
+    """
+    # unique=True also gives Postgres a varchar_pattern_ops index for prefix LIKE
+    query = models.CharField(max_length=200, unique=True)
+    search_count = models.PositiveIntegerField(default=0)
+    last_searched_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-search_count"], name="search_popular_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"'{self.query}' x{self.search_count}"
+
 
 class QueryLog(models.Model):
     """
@@ -47,6 +381,9 @@ class QueryLog(models.Model):
     session_key = models.CharField(max_length=40, blank=True, null=True)
     results_found = models.PositiveIntegerField(default=0)
     latency_ms = models.FloatField()
+    # Per-stage breakdown of latency_ms (null when the stage did not run)
+    embedding_latency_ms = models.FloatField(null=True, blank=True)
+    db_latency_ms = models.FloatField(null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -1,9 +1,11 @@
 # search/repositories/search_repository.py
 from typing import Dict, Any, Optional, List, Tuple
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import QuerySet, Q
 from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
 import logging
 
 from search.models import SearchIndexEntry
@@ -12,15 +14,14 @@ logger = logging.getLogger(__name__)
 
 # try to import pgvector django helpers (optional)
 try:
-    import pgvector  # type: ignore
+    from pgvector.django import CosineDistance  # type: ignore
     HAS_PGVECTOR = True
 except Exception:
     HAS_PGVECTOR = False
 
-# Import or implement your embedding function here (returns List[float])
-# Implementations vary — see embeddings.py below for an example.
+# Embedding function backed by the configured provider (returns List[float])
 try:
-    from ..services.embeddings import generate_embedding  # type: ignore
+    from ..embeddings import generate_embedding  # type: ignore
     HAS_EMBEDDINGS = True
 except Exception:
     generate_embedding = None
@@ -30,35 +31,51 @@ except Exception:
 def parse_filters_for_queryset(raw_filters: Dict[str, str]) -> Dict[str, Any]:
     """
     Convert query params like:
-      metadata__price__lte=100  -> {"metadata__price__lte": 100}
-      metadata__category=seed    -> {"metadata__category": "seed"}
+      metadata__price__lte=100  -> {"price__lte": 100}
+      metadata__category=seed    -> {"category": "seed"}
+      metadata__unit=kg          -> {"metadata__unit": "kg"}
+    Keys listed in SearchIndexEntry.FILTER_FIELDS are routed to their typed,
+    indexed columns; other metadata keys stay JSON lookups.
     We return a dict that can be safely passed to .filter().
     Note: for sqlite fallback, we only support a limited set of lookups.
     """
     parsed = {}
     for k, v in raw_filters.items():
         # only accept keys starting with metadata__ or content_type__model
-        if k.startswith("metadata__") or k == "content_type__model":
-            # attempt to coerce numeric values
-            if v is None:
-                parsed[k] = None
-                continue
-            # try int then float, fallback to string
-            if v.isdigit():
-                parsed[k] = int(v)
-            else:
-                try:
-                    parsed[k] = float(v)
-                except Exception:
-                    parsed[k] = v
+        if not (k.startswith("metadata__") or k == "content_type__model"):
+            continue
+
+        if k == "content_type__model":
+            # ContentType.model is always stored lower-case
+            parsed[k] = v.lower() if isinstance(v, str) else v
+            continue
+
+        meta_key, _, lookup = k[len("metadata__"):].partition("__")
+        column = SearchIndexEntry.FILTER_FIELDS.get(meta_key)
+        if column:
+            k = f"{column}__{lookup}" if lookup else column
+
+        # attempt to coerce numeric values
+        if v is None or not isinstance(v, str):
+            parsed[k] = v
+            continue
+        # try int then float, fallback to string
+        if v.isdigit():
+            parsed[k] = int(v)
+        else:
+            try:
+                parsed[k] = float(v)
+            except Exception:
+                parsed[k] = v
     return parsed
 
 
-def _portable_search(query: Optional[str], filters: Dict[str, str]) -> QuerySet:
+def _portable_search(query: Optional[str], filters: Dict[str, str], base: Optional[QuerySet] = None) -> QuerySet:
     """
     Portable search for non-postgres environments (sqlite/local dev).
     Uses icontains on title/description and only simple metadata equality or
     simple metadata__<key> lookups. Returns a QuerySet (SearchIndexEntry).
+    `base` replaces the live entries as the searched set (benchmark corpora).
     """
     q_obj = Q()
     if query:
@@ -69,7 +86,16 @@ def _portable_search(query: Optional[str], filters: Dict[str, str]) -> QuerySet:
         model_name = filters.pop("content_type__model")
         q_obj &= Q(content_type__model__iexact=model_name)
 
-    qs = SearchIndexEntry.objects.filter(q_obj).order_by("-created_at")
+    if base is None:
+        base = SearchIndexEntry.objects.live()
+    # id breaks created_at ties, so cursor pages never overlap or skip rows
+    qs = base.filter(q_obj).order_by("-created_at", "-id")
+
+    # typed filter columns support every lookup on any database
+    filter_columns = set(SearchIndexEntry.FILTER_FIELDS.values())
+    for fk, fv in list(filters.items()):
+        if fk.partition("__")[0] in filter_columns:
+            qs = qs.filter(**{fk: fv})
 
     # apply simple metadata equality filters (ignore complex ops for sqlite)
     for fk, fv in list(filters.items()):
@@ -80,6 +106,26 @@ def _portable_search(query: Optional[str], filters: Dict[str, str]) -> QuerySet:
     return qs
 
 
+def fulltext_search(query: str, filters: Dict[str, Any], limit: int = 50) -> List[SearchIndexEntry]:
+    """
+    Postgres full-text search over the generated `search_vector` column
+    (GIN indexed). Handles exact names and SKU-like tokens that embeddings
+    tend to blur, and needs no embedding provider.
+    Returns at most `limit` entries, best match first.
+    """
+    if not query:
+        return []
+
+    search_query = SearchQuery(query, search_type="websearch", config="english")
+    qs = SearchIndexEntry.objects.live().filter(search_vector=search_query).annotate(
+        rank=SearchRank(F("search_vector"), search_query)
+    )
+    if filters:
+        qs = qs.filter(**filters)
+
+    return list(qs.order_by("-rank", "id")[:limit])
+
+
 def _postgres_vector_search(
     query: str,
     filters: Dict[str, str],
@@ -89,66 +135,42 @@ def _postgres_vector_search(
     Postgres + pgvector search implementation.
 
     This function:
-    1. Calls generate_embedding(query) -> vector (list[float])
-    2. Runs a SQL query that orders by embedding <-> query_vector (distance)
+    1. Embeds the query (get_query_embedding: deadline + circuit breaker)
+    2. Orders by cosine distance between embedding and query_vector
        and returns id list (SearchIndexEntry ids), then returns a QuerySet filtered
        by those ids in the same order.
 
     Notes:
-    - This implementation constructs a parameterized SQL that casts the
-      query vector literal to the pgvector type. It assumes pgvector extension
-      is installed and the 'embedding' column is of type 'vector'.
-    - generate_embedding must be implemented by you (OpenAI, HF, etc).
+    - Filters (see parse_filters_for_queryset) are applied in the same
+      statement as the distance ordering, so selective filters on the typed
+      columns use their btree indexes and the rest run inside the HNSW scan.
+    - Raises EmbeddingUnavailable when the provider is down; search_index()
+      then falls back to full-text search.
     """
+    # imported lazily: search_services imports this module
+    from search.services.search_services import (
+        EMBEDDING_MODEL, HNSW_EF_SEARCH, _set_ann_params, get_query_embedding,
+    )
 
     if not HAS_EMBEDDINGS or generate_embedding is None:
         raise ImproperlyConfigured(
             "Postgres vector search requested but no generate_embedding() available."
         )
 
-    vec = generate_embedding(query)  # list[float]
+    vec = get_query_embedding(query)  # list[float]; deadline + circuit breaker
     if not isinstance(vec, (list, tuple)) or len(vec) == 0:
         raise ValueError("generate_embedding returned invalid embedding")
 
-    # create a textual literal of the vector in format: '[0.1,0.2, ...]' (pgvector accepts this with cast)
-    # Note: we will pass the literal as a parameter to avoid SQL injection.
-    vec_literal = "[" + ",".join(str(float(x)) for x in vec) + "]"
-
-    # Build SQL with optional metadata filters (only some filters can be pushed into SQL easily).
-    # We'll collect WHERE clauses and params.
-    where_clauses = []
-    params = []
-
-    # optional content_type filter
-    if "content_type__model" in filters:
-        where_clauses.append("content_type_id IN (SELECT id FROM django_content_type WHERE model = %s)")
-        params.append(filters["content_type__model"].lower())
-
-    # For metadata filters, attempt simple JSONB lookups when numeric or string equality
-    for fk, fv in list(filters.items()):
-        if fk.startswith("metadata__") and "__" not in fk[len("metadata__"):]:
-            meta_key = fk[len("metadata__"):]
-            where_clauses.append("(metadata ->> %s) = %s")
-            params.extend([meta_key, str(fv)])
-
-    where_sql = " AND ".join(where_clauses) if where_clauses else "TRUE"
+    qs = SearchIndexEntry.objects.live().embedded_with(EMBEDDING_MODEL)
+    if filters:
+        qs = qs.filter(**filters)
 
-    sql = f"""
-        SELECT id
-        FROM search_searchindexentry
-        WHERE {where_sql}
-        ORDER BY embedding <-> %s
-        LIMIT %s
-    """
-
-    # pass vector literal and limit as params
-    params.extend([vec_literal, limit])
-
-    # Execute SQL and collect ids
-    with connection.cursor() as cur:
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-        ids = [r[0] for r in rows]
+    # Cosine distance matches the opclass of the HNSW index on `embedding`
+    with transaction.atomic():
+        _set_ann_params(max(HNSW_EF_SEARCH, limit))
+        ids = list(
+            qs.order_by(CosineDistance("embedding", vec)).values_list("id", flat=True)[:limit]
+        )
 
     if not ids:
         return SearchIndexEntry.objects.none()
@@ -177,7 +199,8 @@ def search_index(query: Optional[str], filters: Dict[str, str], limit: int = 50)
 
     - Returns a Django QuerySet (SearchIndexEntry)
     - Will try to use pgvector on postgres if available
-    - Falls back to portable icontains search otherwise
+    - Falls back to full-text search on postgres, the in-memory vector index
+      elsewhere, and finally to portable icontains search
     """
     parsed_filters = parse_filters_for_queryset(filters.copy())
 
@@ -187,7 +210,26 @@ def search_index(query: Optional[str], filters: Dict[str, str], limit: int = 50)
             return _postgres_vector_search(query or "", parsed_filters, limit=limit)
         except Exception as e:
             logger.exception("pgvector search failed, falling back: %s", e)
-            # fall through to portable
-            return _portable_search(query, parsed_filters)
-    else:
-        return _portable_search(query, parsed_filters)
+
+    if vendor == "postgresql" and query:
+        # indexed full-text search instead of an icontains table scan
+        ids = [entry.id for entry in fulltext_search(query, parsed_filters, limit=limit)]
+        return SearchIndexEntry.objects.filter(id__in=ids).order_by(CaseOrdering(ids, "id"))
+
+    if query and HAS_EMBEDDINGS:
+        # stay semantic on SQLite / local dev with the in-memory vector index,
+        # through the same path as search_by_vector() (live generations of the
+        # current embedding model, similarity threshold)
+        # imported lazily: search_services imports this module
+        from search.services.search_services import _search_in_memory, get_query_embedding
+
+        try:
+            vec = get_query_embedding(query)  # deadline + circuit breaker
+            ids = [entry.id for entry in _search_in_memory(vec, parsed_filters, limit)]
+            if not ids:
+                return SearchIndexEntry.objects.none()
+            return SearchIndexEntry.objects.filter(id__in=ids).order_by(CaseOrdering(ids, "id"))
+        except Exception as e:
+            logger.exception("in-memory vector search failed, falling back: %s", e)
+
+    return _portable_search(query, parsed_filters)
@@ -0,0 +1,251 @@
+# search/repositories/vector_index.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from search.embeddings import get_embedding_provider
+from search.models import IndexGeneration, SearchIndexEntry
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryVectorIndex:
+    """
+    Exact cosine search over a contiguous float32 matrix of L2-normalized
+    embeddings, used wherever pgvector is not available (SQLite, plain Postgres).
+
+    - search() is one matrix-vector product plus argpartition top-k.
+    - upsert()/remove() keep the matrix in sync with index writes made by this
+      process; refresh() pulls rows changed (and drops rows deleted) by other
+      processes.
+    - save()/load() persist the matrix as .npy files; load() memory-maps them
+      so workers share pages and start instantly.
+    """
+
+    def __init__(self, dimensions: int = 768, model_name: Optional[str] = None):
+        self.dimensions = dimensions
+        self.model_name = model_name  # only entries embedded by this model are loaded
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._size = 0
+        self._row_of = {}
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.synced_at = None  # updated_at watermark of the last DB sync
+        self.generations = {}  # active generations the matrix was loaded from
+        self.loaded_at = 0.0   # time.monotonic() of the last full load
+
+    def __len__(self):
+        return self._size
+
+    # --- helpers -------------------------------------------------------
+    def _normalize(self, vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimensions)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _ensure_capacity(self, rows: int):
+        capacity = self._matrix.shape[0]
+        writable = isinstance(self._matrix, np.ndarray) and not isinstance(self._matrix, np.memmap)
+        if rows <= capacity and writable:
+            return
+        # Grow geometrically (and copy memory-mapped data on first write)
+        new_capacity = max(rows, capacity * 2, 1024)
+        matrix = np.zeros((new_capacity, self.dimensions), dtype=np.float32)
+        ids = np.zeros(new_capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def _reset(self, ids: np.ndarray, matrix: np.ndarray):
+        self._ids = ids
+        self._matrix = matrix
+        self._size = len(ids)
+        self._row_of = {int(pk): row for row, pk in enumerate(ids)}
+
+    # --- writes --------------------------------------------------------
+    def upsert(self, items: Iterable[Tuple[int, Iterable[float]]]):
+        """Adds or replaces (entry_id, vector) pairs."""
+        items = [(int(pk), vector) for pk, vector in items if vector is not None]
+        if not items:
+            return
+        vectors = self._normalize([vector for _, vector in items])
+        with self._lock:
+            self._ensure_capacity(self._size + len(items))
+            for (pk, _), vector in zip(items, vectors):
+                row = self._row_of.get(pk)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids[row] = pk
+                    self._row_of[pk] = row
+                self._matrix[row] = vector
+
+    def remove(self, entry_ids: Iterable[int]):
+        """Removes entries, moving the last row into each hole to stay contiguous."""
+        with self._lock:
+            for pk in entry_ids:
+                row = self._row_of.pop(int(pk), None)
+                if row is None:
+                    continue
+                self._ensure_capacity(self._size)
+                last = self._size - 1
+                if row != last:
+                    moved = int(self._ids[last])
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = moved
+                    self._row_of[moved] = row
+                self._size -= 1
+
+    # --- reads ---------------------------------------------------------
+    def search(self, vector, k: int, candidate_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to k (entry_id, cosine_distance) pairs, closest first.
+        `candidate_ids` restricts the search to a pre-filtered set of entries.
+        """
+        query = self._normalize(vector)[0]
+        with self._lock:
+            if candidate_ids is None:
+                rows = None
+                matrix = self._matrix[:self._size]
+            else:
+                rows = np.fromiter(
+                    (self._row_of[pk] for pk in candidate_ids if pk in self._row_of), dtype=np.int64
+                )
+                matrix = self._matrix[rows]
+            ids = self._ids[:self._size] if rows is None else self._ids[rows]
+            if len(ids) == 0 or k <= 0:
+                return []
+            scores = matrix @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(1.0 - scores[i])) for i in top]
+
+    # --- persistence ---------------------------------------------------
+    def _entries(self):
+        qs = SearchIndexEntry.objects.live().exclude(embedding=None)
+        if self.model_name:
+            qs = qs.embedded_with(self.model_name)
+        return qs
+
+    def load_from_db(self, chunk_size: int = 5000):
+        """Full (re)build from the live SearchIndexEntry generations."""
+        self.generations = IndexGeneration.objects.active_map()
+        qs = self._entries()
+        count = qs.count()
+        ids = np.zeros(count, dtype=np.int64)
+        matrix = np.zeros((count, self.dimensions), dtype=np.float32)
+        watermark = None
+        row = 0
+        for pk, embedding, updated_at in qs.values_list("id", "embedding", "updated_at").iterator(chunk_size=chunk_size):
+            if row >= count:
+                break  # rows inserted while we were reading are picked up by refresh()
+            ids[row] = pk
+            matrix[row] = embedding
+            watermark = updated_at if watermark is None else max(watermark, updated_at)
+            row += 1
+
+        with self._lock:
+            self._reset(ids[:row], self._normalize(matrix[:row]))
+            self.synced_at = watermark
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+        logger.info(f"Loaded {row} embeddings into the in-memory vector index")
+
+    def refresh(self):
+        """Pulls entries written, and drops entries deleted, by other processes since the last sync."""
+        if IndexGeneration.objects.active_map() != self.generations:
+            # A rebuild was promoted: the whole matrix belongs to the old generation
+            self.load_from_db()
+            return
+        qs = self._entries()
+        if self.synced_at is not None:
+            qs = qs.filter(updated_at__gte=self.synced_at)
+        rows = list(qs.values_list("id", "embedding", "updated_at"))
+        if rows:
+            self.upsert((pk, embedding) for pk, embedding, _ in rows)
+            self.synced_at = max(updated_at for _, _, updated_at in rows)
+
+        # Deletions leave no row to sync from: once every live entry is in the
+        # matrix, any surplus rows are entries other processes removed
+        if len(self) > self._entries().count():
+            live_ids = set(self._entries().values_list("id", flat=True))
+            with self._lock:
+                ghosts = [pk for pk in self._row_of if pk not in live_ids]
+            self.remove(ghosts)
+            logger.info(f"Dropped {len(ghosts)} deleted entries from the in-memory vector index")
+
+    def save(self, path: str):
+        with self._lock:
+            np.save(f"{path}.ids.npy", self._ids[:self._size])
+            np.save(f"{path}.vectors.npy", np.ascontiguousarray(self._matrix[:self._size]))
+            with open(f"{path}.meta.json", "w") as f:
+                json.dump({
+                    "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+                    "generations": {str(ct): number for ct, number in self.generations.items()},
+                    "model_name": self.model_name,
+                }, f)
+
+    def load(self, path: str, mmap: bool = True):
+        mode = "r" if mmap else None
+        ids = np.load(f"{path}.ids.npy", mmap_mode=mode)
+        matrix = np.load(f"{path}.vectors.npy", mmap_mode=mode)
+        meta = {}
+        if os.path.exists(f"{path}.meta.json"):
+            with open(f"{path}.meta.json") as f:
+                meta = json.load(f)
+        with self._lock:
+            self._reset(ids, matrix)
+            # refresh() then only pulls rows written after the snapshot
+            # (or reloads everything if a rebuild was promoted since)
+            self.synced_at = parse_datetime(meta.get("synced_at") or "")
+            self.generations = {int(ct): number for ct, number in meta.get("generations", {}).items()}
+            if meta.get("model_name") != self.model_name:
+                # Snapshot of another embedding model: the next refresh() reloads
+                self.generations = None
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+
+vector_index = InMemoryVectorIndex(
+    dimensions=SearchIndexEntry._meta.get_field("embedding").dimensions,
+    model_name=get_embedding_provider().name,
+)
+_last_refresh = 0.0
+
+
+def get_vector_index() -> InMemoryVectorIndex:
+    """
+    The process-wide index, loaded on first use (from SEARCH_VECTOR_INDEX_PATH
+    if a snapshot exists, else from the database) and refreshed incrementally
+    every SEARCH_VECTOR_INDEX_REFRESH_SECONDS.
+    """
+    global _last_refresh
+    path = getattr(settings, "SEARCH_VECTOR_INDEX_PATH", None)
+    refresh_seconds = getattr(settings, "SEARCH_VECTOR_INDEX_REFRESH_SECONDS", 30)
+
+    if not vector_index.loaded:
+        if path and os.path.exists(f"{path}.vectors.npy"):
+            vector_index.load(path)
+        else:
+            vector_index.load_from_db()
+        _last_refresh = time.monotonic()
+
+    if time.monotonic() - _last_refresh > refresh_seconds:
+        _last_refresh = time.monotonic()
+        try:
+            vector_index.refresh()
+        except Exception as e:
+            logger.warning(f"In-memory vector index refresh failed: {e}")
+
+    return vector_index
@@ -1,29 +1,77 @@
 from rest_framework import  permissions, status, views
-from .serializers.search_serializer import SearchResultSerializer
-from .models import SearchIndexEntry
+from .serializers.search_serializer import IndexJobSerializer, SearchResultSerializer
+from .models import IndexJob, SearchIndexEntry
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.apps import apps
+from django.urls import reverse
+from django.contrib.contenttypes.models import ContentType
 from .permissions import IsAdminOrInternalService
-from .services.search_services import index_object, search_by_vector
+from .repositories.search_repository import parse_filters_for_queryset
+from .services.discovery import discovery_sampler
+from .services.job_services import enqueue_job
+from .services.metrics import StageTimer, search_latency, worker_stats
+from .services.query_logger import query_log_writer
+from .services.suggest_services import suggest
+from .services.search_services import (
+    EMBEDDING_MODEL, SEARCH_MODES, VECTOR_STORAGE, EmbeddingUnavailable, delete_entries, embedding_breaker,
+    hydrate_entries, index_object, indexable_models, query_embedding_cache, result_cache, search_by_vector, search_hybrid, search_lexical,
+)
+from django.conf import settings
 
+import base64
+import json
 import logging
 import traceback
 
 logger = logging.getLogger(__name__)
 
+def encode_cursor(offset):
+    """Opaque pagination cursor for the given result offset."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+def decode_cursor(cursor):
+    """Result offset for a cursor from encode_cursor(); 0 if missing or invalid."""
+    if not cursor:
+        return 0
+    try:
+        offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"])
+    except (ValueError, KeyError, TypeError):
+        return 0
+    return max(offset, 0)
+
 class SearchView(views.APIView):
     """
-    Performs semantic search.
+    Performs search. ?mode= selects "semantic" (vector only), "lexical"
+    (full-text only) or "hybrid" (both, fused with reciprocal rank fusion).
     If matches are found -> Returns them with found=True.
     If NO matches are found -> Returns random available products with found=False.
+
+    Results are paginated with ?limit= (capped at SEARCH_MAX_PAGE_SIZE) and the
+    opaque ?cursor= returned as "next_cursor". The ranking query runs once per
+    request and never looks further than SEARCH_MAX_RESULTS rows deep.
+
+    Whole responses are cached for SEARCH_RESULT_CACHE_TTL seconds (zero-result
+    ones for SEARCH_RESULT_CACHE_NEGATIVE_TTL) and expire as soon as an entry
+    of a content type they can contain is re-indexed or deleted.
+
+    Stage timings (embed, ann, lexical, hydrate, serialize) are returned in the
+    Server-Timing header and recorded in the per-worker latency histogram.
+
+    When the query cannot be embedded (provider error, deadline exceeded or
+    the embedding circuit breaker is open) the search degrades to lexical
+    and the response has "degraded": true; degraded responses are not cached.
     """
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, *args, **kwargs):
+        timer = StageTimer()
         query = self.request.query_params.get('q', '').strip()
-        
+        mode = self.request.query_params.get('mode', '').lower()
+        if mode not in SEARCH_MODES:
+            mode = getattr(settings, 'SEARCH_DEFAULT_MODE', 'hybrid')
+
         # 1. Collect Filters
         filters = {}
         for key, value in self.request.query_params.items():
@@ -31,28 +79,90 @@ class SearchView(views.APIView):
                 filters[key] = value
             if key == 'type':
                 filters['content_type__model'] = value
+        # Hot keys (category, price, ...) become lookups on indexed columns
+        filters = parse_filters_for_queryset(filters)
+
+        # 2. Pagination window
+        max_results = getattr(settings, 'SEARCH_MAX_RESULTS', 200)
+        page_size = min(
+            self._int_param('limit') or getattr(settings, 'SEARCH_PAGE_SIZE', 12),
+            getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 50),
+        )
+        offset = min(decode_cursor(self.request.query_params.get('cursor')), max_results)
+        page_size = max(0, min(page_size, max_results - offset))
+        # One extra row tells us whether there is a next page
+        window = offset + page_size + 1
+
+        ef_search = self._int_param('ef_search')
+
+        # 3. Serve repeated requests from the response cache
+        cache_key = None
+        if result_cache.enabled:
+            cache_key = result_cache.make_key(
+                self._content_type_ids(filters.get('content_type__model')),
+                query=query, mode=mode, filters=filters, offset=offset, page_size=page_size,
+                ef_search=ef_search,
+                # Rankings differ per embedding model and vector dimensions
+                vectors=f"{EMBEDDING_MODEL}:{VECTOR_STORAGE}",
+            )
+        # None when the cache backend is down: search uncached
+        if cache_key:
+            with timer.stage('cache'):
+                cached = result_cache.get(cache_key)
+            if cached is not None:
+                return self._respond(query, cached, timer)
 
-        # 2. Initialize Result Variables
-        qs = None
+        # 4. Initialize Result Variables
+        ranked = []
         found = False
+        failed = False
+        degraded = False
         message = ""
+        next_cursor = None
 
-        # 3. Attempt Vector Search
-        if query:
+        # Provider known to be down: skip the embedding call entirely
+        if mode != 'lexical' and not embedding_breaker.allows_request():
+            mode = 'lexical'
+            degraded = True
+
+        # 5. Attempt Search (a single ranking query for the whole window)
+        if query and page_size:
             try:
-                # search_by_vector should handle the "threshold" logic internally
-                # and return an empty queryset if distances are too high.
-                qs = search_by_vector(query=query, filters=filters)
+                # search_by_vector handles the "threshold" logic internally
+                # and returns an empty list if distances are too high.
+                if mode == 'lexical':
+                    ranked = search_lexical(query=query, filters=filters, limit=window, timings=timer.timings)
+                else:
+                    search = search_hybrid if mode == 'hybrid' else search_by_vector
+                    ranked = search(
+                        query=query,
+                        filters=filters,
+                        limit=window,
+                        ef_search=ef_search,
+                        timings=timer.timings,
+                    )
+            except EmbeddingUnavailable as e:
+                logger.warning(f"Query embedding unavailable, serving lexical results: {e}")
+                degraded = True
+                try:
+                    ranked = search_lexical(query=query, filters=filters, limit=window, timings=timer.timings)
+                except Exception as e:
+                    logger.error(f"Lexical fallback failed: {e}")
+                    failed = True
             except Exception as e:
-                logger.error(f"Vector search failed: {e}")
+                logger.error(f"Search ({mode}) failed: {e}")
                 logger.debug(traceback.format_exc())
-                qs = None
+                ranked = []
+                failed = True
 
-        # 4. Check Results & Handle Fallback
-        # If we have a query, and vector search returned results:
-        if qs is not None and qs.exists():
+        # 6. Check Results & Handle Fallback
+        # "found" is derived from the same result set we serialize
+        if ranked:
             found = True
-            message = "Matches found"
+            results = ranked[offset:offset + page_size]
+            message = "Matches found" if results else "No more matches"
+            if len(ranked) > offset + page_size and offset + page_size < max_results:
+                next_cursor = encode_cursor(offset + page_size)
         else:
             # --- FALLBACK SCENARIO ---
             found = False
@@ -61,30 +171,105 @@ class SearchView(views.APIView):
             else:
                 message = "Discover our products."
 
-            # Fetch random available items from the index to keep the user engaged
-            # Note: .order_by('?') is expensive on massive DBs, but fine for MVP/startups
-            qs = SearchIndexEntry.objects.all().order_by('?')[:12]
-
-            # Apply type filter to fallback if it exists (so we don't show services when looking for products)
-            if 'content_type__model' in filters:
-                qs = qs.filter(content_type__model__iexact=filters['content_type__model'])
+            # Fetch random available items from the index to keep the user engaged.
+            # The type filter is applied before sampling (so we don't show services
+            # when looking for products) and the sample comes from a precomputed pool.
+            results = discovery_sampler.sample(
+                page_size or 12, model_name=filters.get('content_type__model')
+            )
 
-        # 5. Serialize
-        serializer = SearchResultSerializer(qs, many=True)
+        # 7. Serialize (target objects bulk-loaded, constant number of queries)
+        with timer.stage('hydrate'):
+            entries = hydrate_entries(results)
+        with timer.stage('serialize'):
+            serialized = SearchResultSerializer(entries, many=True).data
 
-        # 6. Return Custom Response Structure
-        return Response({
-            "results": serializer.data,
+        # 8. Return Custom Response Structure
+        data = {
+            "results": serialized,
             "found": found,
-            "message": message
-        }, status=status.HTTP_200_OK)
+            "message": message,
+            "next_cursor": next_cursor,
+            "degraded": degraded,
+        }
+        # Errors and degraded answers are not cached: the next request should try again
+        if cache_key and not failed and not degraded:
+            result_cache.set(cache_key, data, found)
+        return self._respond(query, data, timer)
+
+    def _respond(self, query, data, timer):
+        """Records timings and the query log row, and attaches Server-Timing."""
+        response = Response(data, status=status.HTTP_200_OK)
+        response['Server-Timing'] = timer.server_timing()
+        search_latency.observe_all({**timer.timings, 'total': timer.total_ms()})
+        self._log_query(query, data, timer)
+        return response
+
+    def _log_query(self, query, data, timer):
+        """Queues a QueryLog row; written in batches off the request path."""
+        if not query or not getattr(settings, 'SEARCH_QUERY_LOG_ENABLED', True):
+            return
+        timings = timer.timings
+        db_stages = [timings[stage] for stage in ('ann', 'lexical') if stage in timings]
+        user = getattr(self.request, 'user', None)
+        session = getattr(self.request, 'session', None)
+        query_log_writer.log(
+            query_text=query[:500],
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            session_key=session.session_key if session is not None else None,
+            results_found=len(data["results"]) if data["found"] else 0,
+            latency_ms=timer.total_ms(),
+            embedding_latency_ms=timings.get('embed'),
+            db_latency_ms=sum(db_stages) if db_stages else None,
+        )
+
+    def _content_type_ids(self, model_name):
+        """Content types a request can return (all indexable ones without ?type=)."""
+        models = [m for m in indexable_models() if not model_name or m._meta.model_name == model_name]
+        return [ct.id for ct in ContentType.objects.get_for_models(*models).values()]
+
+    def _int_param(self, name):
+        """Optional positive integer query param (e.g. ?ef_search=100), else None."""
+        try:
+            value = int(self.request.query_params.get(name, ''))
+        except ValueError:
+            return None
+        return value if value > 0 else None
+
+
+class SuggestView(views.APIView):
+    """
+    Autocomplete: GET /api/search/suggest/?q=<prefix>[&type=listing][&limit=8]
+    Answers from the title trigram index and the PopularQuery table only
+    (no embedding call), so it can run on every keystroke.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        timer = StageTimer()
+        try:
+            limit = int(request.query_params.get('limit', ''))
+        except ValueError:
+            limit = None
+        with timer.stage('suggest'):
+            suggestions = suggest(
+                request.query_params.get('q', ''),
+                limit=limit,
+                model_name=request.query_params.get('type'),
+            )
+        search_latency.observe('suggest', timer.timings['suggest'])
+        response = Response({"suggestions": suggestions}, status=status.HTTP_200_OK)
+        response['Server-Timing'] = timer.server_timing()
+        return response
 
 
 class IndexAdminViewSet(viewsets.ViewSet):
     """
     Admin endpoints for managing the search index.
     Implements: POST /search/index/, DELETE /search/index/{id},
-                POST /search/bulk/, POST /search/rebuild/
+                POST /search/bulk/, POST /search/rebuild/, GET /search/jobs/{id}/
+    Bulk and rebuild requests are queued as IndexJob rows and run by
+    `manage.py search_worker`.
     """
     permission_classes = [IsAdminOrInternalService]
 
@@ -116,34 +301,107 @@ class IndexAdminViewSet(viewsets.ViewSet):
         try:
             index_entry = SearchIndexEntry.objects.get(pk=pk)
             obj_repr = str(index_entry)
-            index_entry.delete()
+            delete_entries(SearchIndexEntry.objects.filter(pk=index_entry.pk))
             return Response({"status": "deleted", "entry": obj_repr}, status=status.HTTP_204_NO_CONTENT)
         except SearchIndexEntry.DoesNotExist:
             return Response({"error": "Index entry not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    def _indexable_model(self, request):
+        """The model named by app_label/model_name in the body, or (None, error response)."""
+        app_label = request.data.get('app_label')
+        model_name = request.data.get('model_name')
+        try:
+            Model = apps.get_model(app_label, model_name)
+        except (LookupError, ValueError, TypeError):
+            return None, Response(
+                {"error": f"Model {app_label}.{model_name} not found"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not hasattr(Model, 'to_search_document'):
+            return None, Response(
+                {"error": f"Model {app_label}.{model_name} is not searchable"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Model, None
+
+    def _job_accepted(self, request, job):
+        data = IndexJobSerializer(job).data
+        data["status_url"] = request.build_absolute_uri(reverse('index-admin-job', kwargs={'job_id': job.pk}))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        (POST /search/index-admin/bulk/)
+        Queues a background job indexing many objects of one model.
+        Expects: { "app_label": "products", "model_name": "listing", "object_ids": [1, 2, 3] }
+        Omit "object_ids" to index every object. Returns the job (202).
+        """
+        Model, error = self._indexable_model(request)
+        if error:
+            return error
+
+        object_ids = request.data.get('object_ids')
+        if object_ids is not None and (
+            not isinstance(object_ids, list) or not all(isinstance(pk, int) for pk in object_ids)
+        ):
+            return Response({"error": "object_ids must be a list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue_job(IndexJob.KIND_BULK, Model, object_ids=object_ids)
+        return self._job_accepted(request, job)
+
     @action(detail=False, methods=['post'])
     def rebuild(self, request):
         """
-        (POST /search/rebuild/)
-        Rebuilds the entire index for a given model.
+        (POST /search/index-admin/rebuild/)
+        Queues a background rebuild of the index for a given model. Every object
+        is indexed into a new (shadow) generation while search keeps reading the
+        active one; when the job finishes the new generation is promoted in one
+        transaction and the old one is garbage-collected, so objects that no
+        longer exist drop out with it. Returns the job (202).
         Expects: { "app_label": "listings", "model_name": "listing" }
         """
-        app_label = request.data.get('app_label')
-        model_name = request.data.get('model_name')
-        
+        Model, error = self._indexable_model(request)
+        if error:
+            return error
+
+        job = enqueue_job(IndexJob.KIND_REBUILD, Model)
+        return self._job_accepted(request, job)
+
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>\d+)', url_name='job')
+    def job(self, request, job_id=None):
+        """
+        (GET /search/index-admin/jobs/{id}/)
+        Status and progress of a bulk-index / rebuild job.
+        """
         try:
-            Model = apps.get_model(app_label, model_name)
-        except LookupError:
-            return Response({"error": f"Model {app_label}.{model_name} not found"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Clear existing entries for this model
-        ContentType = apps.get_model('contenttypes', 'ContentType')
-        content_type = ContentType.objects.get_for_model(Model)
-        SearchIndexEntry.objects.filter(content_type=content_type).delete()
-        
-        count = 0
-        for instance in Model.objects.all():
-            index_object(instance)
-            count += 1
-            
-        return Response({"status": "rebuild complete", "model": model_name, "indexed_items": count})
\ No newline at end of file
+            job = IndexJob.objects.get(pk=job_id)
+        except IndexJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(IndexJobSerializer(job).data)
+
+    @action(detail=False, methods=['get'], url_path='query-cache')
+    def query_cache(self, request):
+        """
+        (GET /search/index-admin/query-cache/)
+        Hit/miss counters for the query embedding and result caches of this worker.
+        """
+        return Response({**query_embedding_cache.stats(), "result_cache": result_cache.stats()})
+
+    @action(detail=False, methods=['get', 'delete'])
+    def metrics(self, request):
+        """
+        (GET /search/index-admin/metrics/)
+        Per-stage search latency (p50/p95/p99, ms), cache/query-log counters
+        embedding circuit breaker state (state, trips, rejected calls) and boot
+        time of this worker. DELETE resets the histograms, e.g. after a deploy.
+        """
+        if request.method == 'DELETE':
+            search_latency.reset()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({
+            "stages": search_latency.snapshot(),
+            "query_cache": query_embedding_cache.stats(),
+            "result_cache": result_cache.stats(),
+            "query_log": query_log_writer.stats(),
+            "embedding_breaker": embedding_breaker.stats(),
+            "worker": worker_stats(),
+        })
@@ -1,6 +1,7 @@
 # search/serializers.py
+from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
-from ..models import SearchIndexEntry
+from ..models import IndexJob, SearchIndexEntry
 
 class SearchResultSerializer(serializers.ModelSerializer):
     """
@@ -8,10 +9,13 @@ class SearchResultSerializer(serializers.ModelSerializer):
     (Implements SR-05)
     """
     # 'distance' is the annotated field from our query
-    distance = serializers.FloatField(read_only=True)
+    # (None for entries that only matched the lexical leg)
+    distance = serializers.FloatField(read_only=True, allow_null=True)
     
     # 'content_object' is a GenericForeignKey. We need to serialize it
     # manually to show what object was found.
+    # Pass entries through search_services.hydrate_entries() first, otherwise
+    # every row costs extra queries.
     found_object = serializers.SerializerMethodField()
 
     class Meta:
@@ -26,9 +30,45 @@ class SearchResultSerializer(serializers.ModelSerializer):
 
     def get_found_object(self, obj: SearchIndexEntry) -> dict:
         # You can customize this. Maybe return a URL to the object.
+        # get_for_id() is served from ContentType's in-process cache
+        content_object = obj.content_object
         return {
-            'type': obj.content_type.model,
+            'type': ContentType.objects.get_for_id(obj.content_type_id).model,
             'id': obj.object_id,
-            # This is slow! Better to have a 'get_absolute_url' on the model
-            'representation': str(obj.content_object) 
-        }
\ No newline at end of file
+            'representation': str(content_object) if content_object is not None else obj.title
+        }
+
+
+class IndexJobSerializer(serializers.ModelSerializer):
+    """
+    Status and progress of a background bulk-index / rebuild job.
+    """
+    model = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IndexJob
+        fields = [
+            'id',
+            'kind',
+            'status',
+            'model',
+            'total',
+            'processed',
+            'indexed',
+            'progress',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+
+    def get_model(self, obj: IndexJob) -> str:
+        content_type = ContentType.objects.get_for_id(obj.content_type_id)
+        return f"{content_type.app_label}.{content_type.model}"
+
+    def get_progress(self, obj: IndexJob) -> float:
+        # Percentage of source objects processed so far
+        if obj.status == IndexJob.STATUS_SUCCEEDED:
+            return 100.0
+        return round(100.0 * obj.processed / obj.total, 1) if obj.total else 0.0
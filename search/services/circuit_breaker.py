@@ -0,0 +1,120 @@
+# search/services/circuit_breaker.py
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency the breaker considers down."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for calls to a remote dependency.
+
+    A call that raises, or that succeeds but takes longer than
+    `slow_call_ms`, counts as a failure. After `failure_threshold`
+    consecutive failures the breaker opens: call() raises CircuitOpenError
+    immediately for `reset_seconds`. Then one trial call is let through
+    (half-open); its outcome closes the breaker or opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, slow_call_ms=2000.0, reset_seconds=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_ms = slow_call_ms
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.slow_calls = 0
+        self.failures = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allows_request(self):
+        """True unless calls are currently rejected (does not reserve the half-open trial)."""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._trial_running)
+
+    def _acquire(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if self._clock() - self._opened_at >= self.reset_seconds and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def call(self, func, *args, **kwargs):
+        trial = self._acquire()
+        started = self._clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record(False, trial)
+            raise
+        elapsed_ms = (self._clock() - started) * 1000
+        slow = elapsed_ms > self.slow_call_ms
+        if slow:
+            with self._lock:
+                self.slow_calls += 1
+            logger.warning(f"{self.name} call took {elapsed_ms:.0f}ms (slow threshold {self.slow_call_ms:.0f}ms)")
+        self._record(not slow, trial)
+        return result
+
+    def _record(self, success, trial):
+        with self._lock:
+            if trial:
+                self._trial_running = False
+            if success:
+                self.consecutive_failures = 0
+                if self._state != self.CLOSED:
+                    logger.info(f"{self.name} circuit closed")
+                self._state = self.CLOSED
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            if trial or (self._state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self.trips += 1
+                logger.warning(
+                    f"{self.name} circuit opened after {self.consecutive_failures} consecutive failures "
+                    f"(retrying in {self.reset_seconds:.0f}s)"
+                )
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._trial_running = False
+            self.consecutive_failures = 0
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+            }
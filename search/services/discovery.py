@@ -0,0 +1,126 @@
+# search/services/discovery.py
+import logging
+import random
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from ..models import SearchIndexEntry
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoverySampler:
+    """
+    Random "discover our products" picks without ORDER BY random() per request.
+
+    A pool of eligible entry ids is kept per content type in the shared cache
+    and rebuilt every `refresh_seconds`. Drawing k entries is then O(k) plus
+    one primary-key lookup. Large tables build the pool with TABLESAMPLE
+    instead of sorting the whole table.
+    """
+
+    def __init__(self, pool_size=2000, refresh_seconds=300, tablesample_rows=100000, cache_alias="default"):
+        self.pool_size = pool_size
+        self.refresh_seconds = refresh_seconds
+        self.tablesample_rows = tablesample_rows
+        self.cache_alias = cache_alias
+
+    VERSION_KEY = "search:discovery:version"
+
+    def _version(self, cache):
+        try:
+            return cache.get(self.VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Discovery pool version read failed: {e}")
+            return 0
+
+    def _cache_key(self, model_name, version):
+        return f"search:discovery:{version}:{(model_name or '*').lower()}"
+
+    def clear(self):
+        """Drops every pool (one per model name) by moving to a new key version."""
+        cache = caches[self.cache_alias]
+        try:
+            # add() first: incr() fails on a missing key (and must never expire)
+            cache.add(self.VERSION_KEY, 0, None)
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            cache.set(self.VERSION_KEY, 1, None)  # evicted between add() and incr()
+        except Exception as e:
+            logger.warning(f"Discovery pool invalidation failed: {e}")
+
+    def _eligible(self, model_name):
+        # Filter by type *before* sampling, so the pool only holds usable ids
+        qs = SearchIndexEntry.objects.live().exclude(status="inactive")
+        if model_name:
+            qs = qs.filter(content_type__in=ContentType.objects.filter(model__iexact=model_name))
+        return qs
+
+    def _estimated_rows(self):
+        if connection.vendor != "postgresql":
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [SearchIndexEntry._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] > 0 else 0
+
+    def _build_pool(self, model_name):
+        eligible = self._eligible(model_name)
+        estimated = self._estimated_rows()
+
+        if estimated > self.tablesample_rows:
+            # Read a random ~3x oversample of pages instead of the whole table
+            percent = min(100.0, 300.0 * self.pool_size / estimated)
+            quote = connection.ops.quote_name
+            # The sample is small, so the eligibility filters run on it through
+            # primary-key lookups (a semi-join), never on the whole table
+            sampled = RawSQL(
+                f"SELECT {quote('id')} FROM {quote(SearchIndexEntry._meta.db_table)} TABLESAMPLE SYSTEM (%s)",
+                [percent],
+            )
+            ids = list(eligible.filter(id__in=sampled).values_list("id", flat=True)[:self.pool_size])
+            if ids:
+                return ids
+
+        # Small table: sorting just the ids every refresh_seconds is cheap
+        return list(eligible.order_by("?").values_list("id", flat=True)[:self.pool_size])
+
+    def get_pool(self, model_name=None):
+        cache = caches[self.cache_alias]
+        key = self._cache_key(model_name, self._version(cache))
+        try:
+            pool = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Discovery pool cache read failed: {e}")
+            pool = None
+
+        if pool is None:
+            pool = self._build_pool(model_name)
+            try:
+                cache.set(key, pool, self.refresh_seconds)
+            except Exception as e:
+                logger.warning(f"Discovery pool cache write failed: {e}")
+        return pool
+
+    def sample(self, k, model_name=None):
+        """Returns up to k random eligible entries, optionally of one model type."""
+        pool = self.get_pool(model_name)
+        ids = random.sample(pool, min(k, len(pool)))
+        if not ids:
+            return []
+
+        # Entries deleted (or swapped out by a rebuild) since the pool was built are simply skipped
+        by_id = SearchIndexEntry.objects.live().in_bulk(ids)
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+
+discovery_sampler = DiscoverySampler(
+    pool_size=getattr(settings, 'SEARCH_DISCOVERY_POOL_SIZE', 2000),
+    refresh_seconds=getattr(settings, 'SEARCH_DISCOVERY_REFRESH_SECONDS', 300),
+    tablesample_rows=getattr(settings, 'SEARCH_DISCOVERY_TABLESAMPLE_ROWS', 100000),
+)
@@ -0,0 +1,98 @@
+# search/services/generation_services.py
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from ..models import ACTIVE_GENERATIONS_CACHE_TTL, IndexGeneration, SearchIndexEntry
+from .discovery import discovery_sampler
+from .search_services import result_cache
+
+logger = logging.getLogger(__name__)
+
+
+def start_generation(content_type):
+    """Creates the next ("building") generation of a content type's index."""
+    with transaction.atomic():
+        # Serialize concurrent starts on the content type's generation rows
+        list(IndexGeneration.objects.select_for_update().filter(content_type=content_type))
+        latest = IndexGeneration.objects.filter(content_type=content_type).aggregate(n=Max('number'))['n']
+        number = max(latest or 0, _live_number(content_type.id)) + 1
+        generation = IndexGeneration.objects.create(content_type=content_type, number=number)
+        transaction.on_commit(IndexGeneration.objects.clear_cache)
+    logger.info(f"Started index generation {number} for content type {content_type.id}")
+    return generation
+
+
+def _live_number(content_type_id):
+    return IndexGeneration.objects.active_map().get(content_type_id, 0)
+
+
+def promote_generation(generation):
+    """
+    Atomically makes `generation` the one searches read (the pointer swap)
+    and retires the previous one; its entries are removed by collect_garbage().
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(IndexGeneration.objects.select_for_update().filter(content_type_id=generation.content_type_id))
+        previous = next((row for row in rows if row.state == IndexGeneration.STATE_ACTIVE), None)
+        if previous is not None:
+            previous.state = IndexGeneration.STATE_RETIRED
+            previous.retired_at = now
+            previous.save(update_fields=['state', 'retired_at'])
+        elif generation.number != 0:
+            # Entries written before generations existed live in implicit generation 0
+            IndexGeneration.objects.get_or_create(
+                content_type_id=generation.content_type_id, number=0,
+                defaults={'state': IndexGeneration.STATE_RETIRED, 'retired_at': now},
+            )
+
+        generation.state = IndexGeneration.STATE_ACTIVE
+        generation.activated_at = now
+        generation.save(update_fields=['state', 'activated_at'])
+
+        def publish():
+            IndexGeneration.objects.clear_cache()
+            if result_cache.enabled:
+                result_cache.bump([generation.content_type_id])
+            # Pools hold entry ids of the old generation
+            discovery_sampler.clear()
+        transaction.on_commit(publish)
+
+    logger.info(f"Promoted index generation {generation.number} for content type {generation.content_type_id}")
+
+
+def abandon_generation(generation):
+    """Retires a generation whose build failed; collect_garbage() removes its entries."""
+    IndexGeneration.objects.filter(pk=generation.pk, state=IndexGeneration.STATE_BUILDING).update(
+        state=IndexGeneration.STATE_RETIRED, retired_at=timezone.now()
+    )
+    IndexGeneration.objects.clear_cache()
+
+
+def collect_garbage(batch_size=1000):
+    """
+    Deletes up to `batch_size` entries of retired generations (small batches
+    keep locks and WAL bursts short), and the generation rows once empty.
+    Generations are only collected once every process has seen the pointer
+    swap (ACTIVE_GENERATIONS_CACHE_TTL), so no search reads a half-deleted one.
+    Returns the number of entries deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=ACTIVE_GENERATIONS_CACHE_TTL)
+    retired = IndexGeneration.objects.filter(state=IndexGeneration.STATE_RETIRED).filter(
+        Q(retired_at__lt=cutoff) | Q(retired_at=None)
+    )
+    for generation in retired.order_by('id'):
+        ids = list(
+            SearchIndexEntry.objects.filter(
+                content_type_id=generation.content_type_id, generation=generation.number,
+            ).values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            deleted, _ = SearchIndexEntry.objects.filter(id__in=ids).delete()
+            return deleted
+        generation.delete()
+        logger.info(f"Garbage-collected index generation {generation.number} "
+                    f"of content type {generation.content_type_id}")
+    return 0
@@ -0,0 +1,161 @@
+# search/services/job_services.py
+import logging
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import IndexGeneration, IndexJob
+from .generation_services import abandon_generation, promote_generation, start_generation
+from .search_services import MAX_EMBED_BATCH_SIZE, index_objects, iter_chunks, source_queryset, throttle_embedding_call
+
+logger = logging.getLogger(__name__)
+
+# Consecutive failed chunks before a job is marked as failed
+MAX_JOB_ATTEMPTS = 5
+# A leased job is hidden from other workers for this long; if the worker
+# dies mid-chunk the job becomes due again afterwards
+JOB_LEASE_SECONDS = 600
+# Retry delays of a failed chunk grow as 30s, 60s, 120s, ... capped at 10 minutes
+JOB_RETRY_BASE_SECONDS = 30
+JOB_RETRY_MAX_SECONDS = 600
+
+
+def _source_queryset(model, object_ids=None):
+    qs = source_queryset(model)
+    if object_ids is not None:
+        qs = qs.filter(pk__in=object_ids)
+    return qs
+
+
+def enqueue_job(kind, model, object_ids=None):
+    """Queues a bulk-index or rebuild job for `model` and returns it."""
+    return IndexJob.objects.create(
+        kind=kind,
+        content_type=ContentType.objects.get_for_model(model),
+        object_ids=object_ids,
+        total=_source_queryset(model, object_ids).count(),
+    )
+
+
+def _finish(job, status, error=""):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save()
+    if status == IndexJob.STATUS_FAILED and job.generation is not None:
+        # Never promote a partial rebuild; its entries are garbage-collected
+        abandon_generation(_job_generation(job))
+
+
+def _job_generation(job):
+    return IndexGeneration.objects.get(content_type_id=job.content_type_id, number=job.generation)
+
+
+def _claim_job():
+    """
+    Leases the oldest due unfinished job in a short transaction (like
+    outbox_services._claim): its row lock is released before any provider
+    call is made, and a job backing off after a failure does not block the
+    jobs queued after it.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            IndexJob.objects.select_for_update(skip_locked=True)
+            .filter(status__in=[IndexJob.STATUS_QUEUED, IndexJob.STATUS_RUNNING])
+            .filter(Q(leased_until=None) | Q(leased_until__lte=now))
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+
+        if job.content_type.model_class() is None:
+            _finish(job, IndexJob.STATUS_FAILED, f"Unknown content type {job.content_type_id}")
+            return None
+
+        if job.status == IndexJob.STATUS_QUEUED:
+            job.status = IndexJob.STATUS_RUNNING
+            job.started_at = now
+            if job.kind == IndexJob.KIND_REBUILD:
+                # Build into a shadow generation; searches keep reading the active one
+                job.generation = start_generation(job.content_type).number
+        job.leased_until = now + timedelta(seconds=JOB_LEASE_SECONDS)
+        job.save()
+    return job
+
+
+def _record_chunk(job_id, after_pk, chunk, count, error):
+    """Stores the outcome of a leased chunk in a second short transaction."""
+    with transaction.atomic():
+        job = IndexJob.objects.select_for_update().get(pk=job_id)
+        if job.last_pk != after_pk or job.status != IndexJob.STATUS_RUNNING:
+            # The lease ran out and another worker already moved the job on
+            return 0
+
+        if error is not None:
+            job.attempts += 1
+            if job.attempts >= MAX_JOB_ATTEMPTS:
+                _finish(job, IndexJob.STATUS_FAILED, f"Indexing the chunk after #{after_pk} failed: {error}")
+            else:
+                delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1), JOB_RETRY_MAX_SECONDS)
+                job.leased_until = timezone.now() + timedelta(seconds=delay)
+                job.error = f"{error}, retrying"[:2000]
+                job.save()
+            return 0
+
+        job.processed += len(chunk)
+        job.indexed += count
+        job.last_pk = chunk[-1].pk
+        job.attempts = 0
+        job.error = ""
+        job.leased_until = None
+        job.save()
+        return len(chunk)
+
+
+def process_job_chunk(chunk_size=None):
+    """
+    Leases the oldest unfinished job, indexes its next chunk of objects (one
+    batched embedding call, one bulk upsert) outside any transaction and
+    records the progress. A chunk that raises or whose embedding call fails
+    is retried with backoff, and fails the job after MAX_JOB_ATTEMPTS.
+    Returns the number of objects processed (0 when no job needed work).
+    """
+    chunk_size = max(1, min(chunk_size or MAX_EMBED_BATCH_SIZE, MAX_EMBED_BATCH_SIZE))
+
+    job = _claim_job()
+    if job is None:
+        return 0
+
+    chunk = []
+    count = None
+    error = None
+    try:
+        # Keyset pagination: resumable from last_pk after a restart
+        model = job.content_type.model_class()
+        chunk = next(iter_chunks(_source_queryset(model, job.object_ids), chunk_size, after_pk=job.last_pk), [])
+
+        if not chunk:
+            with transaction.atomic():
+                if job.generation is not None:
+                    promote_generation(_job_generation(job))
+                job.leased_until = None
+                _finish(job, IndexJob.STATUS_SUCCEEDED)
+            logger.info(f"Index job {job.pk} finished: {job.indexed}/{job.total} indexed")
+            return 0
+
+        # Jobs share the Gemini quota with everything else: one batch call per token
+        count = index_objects(
+            chunk,
+            generations=None if job.generation is None else [job.generation],
+            before_batch=throttle_embedding_call,
+        )
+        if count is None:
+            error = "Embedding provider call failed"
+    except Exception as e:
+        logger.warning(f"Index job {job.pk} chunk after #{job.last_pk} failed: {e}")
+        error = e
+
+    return _record_chunk(job.pk, job.last_pk, chunk, count, error)
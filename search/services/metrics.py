@@ -0,0 +1,129 @@
+# search/services/metrics.py
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(timings, stage):
+    """Adds the milliseconds spent in the block to timings[stage] (if timings is a dict)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class StageTimer:
+    """
+    Per-request stage timings in milliseconds.
+
+    `timings` is a plain dict, so it can be handed to the search functions
+    (their `timings=` argument) and filled in by them as well.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+
+    def stage(self, name):
+        return timed(self.timings, name)
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        """Value for the Server-Timing response header (shown by browser dev tools)."""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+
+class LatencyHistogram:
+    """
+    In-process latency histograms, one per stage, with fixed log-spaced
+    buckets (0.1ms to 2 min, 5% apart). Recording is O(log buckets) and
+    memory is constant, so it is cheap enough for every request; reported
+    percentiles are the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, smallest_ms=0.1, largest_ms=120000.0, growth=1.05):
+        bounds = []
+        bound = smallest_ms
+        while bound < largest_ms:
+            bounds.append(bound)
+            bound *= growth
+        bounds.append(largest_ms)
+        self.bounds = bounds
+        self._counts = {}
+        self._max = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, ms):
+        index = min(bisect.bisect_left(self.bounds, ms), len(self.bounds) - 1)
+        with self._lock:
+            counts = self._counts.get(stage)
+            if counts is None:
+                counts = self._counts[stage] = [0] * len(self.bounds)
+            counts[index] += 1
+            self._max[stage] = max(self._max.get(stage, 0.0), ms)
+
+    def observe_all(self, timings):
+        for stage, ms in timings.items():
+            self.observe(stage, ms)
+
+    def _percentile(self, counts, total, fraction):
+        rank = fraction * total
+        seen = 0
+        for bound, count in zip(self.bounds, counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.bounds[-1]
+
+    def snapshot(self):
+        """{stage: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}"""
+        with self._lock:
+            items = [(stage, list(counts), self._max[stage]) for stage, counts in self._counts.items()]
+        report = {}
+        for stage, counts, max_ms in sorted(items):
+            total = sum(counts)
+            report[stage] = {
+                "count": total,
+                "p50_ms": round(min(self._percentile(counts, total, 0.50), max_ms), 2),
+                "p95_ms": round(min(self._percentile(counts, total, 0.95), max_ms), 2),
+                "p99_ms": round(min(self._percentile(counts, total, 0.99), max_ms), 2),
+                "max_ms": round(max_ms, 2),
+            }
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+            self._max.clear()
+
+
+# Stage latencies of the search endpoint in this worker
+search_latency = LatencyHistogram()
+
+
+# Boot of this worker process, recorded by the gunicorn post_worker_init hook
+# (teseapp/gunicorn.conf.py); empty outside gunicorn
+_worker_boot = {}
+
+
+def record_worker_boot(boot_ms):
+    """Records how long this worker took from fork to a loaded application."""
+    _worker_boot.update(pid=os.getpid(), boot_ms=round(boot_ms, 1), booted_at=time.time())
+
+
+def worker_stats():
+    """{"pid", "boot_ms", "uptime_s"} of this worker ({"pid"} outside gunicorn)."""
+    stats = {"pid": os.getpid()}
+    if _worker_boot.get("pid") == os.getpid():
+        stats["boot_ms"] = _worker_boot["boot_ms"]
+        stats["uptime_s"] = round(time.time() - _worker_boot["booted_at"], 1)
+    return stats
@@ -0,0 +1,172 @@
+# search/services/outbox_services.py
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from ..models import IndexOutbox, SearchIndexEntry
+from .search_services import delete_entries, index_object, index_objects, source_queryset, throttle_embedding_call
+
+logger = logging.getLogger(__name__)
+
+# Retry delays grow as 30s, 60s, 120s, ... capped at one hour
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# Claimed rows are hidden from other workers for this long; if the claiming
+# worker dies they become due again afterwards
+CLAIM_LEASE_SECONDS = 600
+
+
+def _enqueue(instance, action):
+    content_type = ContentType.objects.get_for_model(instance)
+    object_id = instance.pk
+
+    def record():
+        if not getattr(settings, 'SEARCH_INDEX_ASYNC', True):
+            # Synchronous mode (local dev without a worker): index right after commit
+            if action == IndexOutbox.ACTION_INDEX:
+                index_object(instance)
+            else:
+                delete_entries(SearchIndexEntry.objects.filter(content_type=content_type, object_id=object_id))
+            return
+
+        IndexOutbox.objects.create(content_type=content_type, object_id=object_id, action=action)
+
+    # Only record work for data that was actually committed, and only once
+    # related rows written later in the same transaction (e.g. images) exist.
+    transaction.on_commit(record)
+
+
+def enqueue_index(instance):
+    _enqueue(instance, IndexOutbox.ACTION_INDEX)
+
+
+def enqueue_delete(instance):
+    _enqueue(instance, IndexOutbox.ACTION_DELETE)
+
+
+def _mark_failed(rows, error, max_attempts):
+    now = timezone.now()
+    for row in rows:
+        row.attempts += 1
+        row.last_error = str(error)[:2000]
+        if row.attempts >= max_attempts:
+            row.status = IndexOutbox.STATUS_DEAD
+            logger.error(f"Dead-lettered index outbox row {row}: {error}")
+        else:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (row.attempts - 1), RETRY_MAX_SECONDS)
+            row.available_at = now + timedelta(seconds=delay)
+    IndexOutbox.objects.bulk_update(rows, ['attempts', 'last_error', 'status', 'available_at'])
+
+
+def _index_group(model, object_ids):
+    """
+    Indexes the given objects. Returns {object_id: error} for the ones that
+    failed; objects that no longer exist are removed from the index.
+    """
+    instances = list(source_queryset(model).filter(pk__in=object_ids))
+    content_type = ContentType.objects.get_for_model(model)
+
+    gone = set(object_ids) - {instance.pk for instance in instances}
+    if gone:
+        delete_entries(SearchIndexEntry.objects.filter(content_type=content_type, object_id__in=gone))
+
+    try:
+        count = index_objects(instances, before_batch=throttle_embedding_call)
+    except Exception as e:
+        logger.warning(f"Bulk indexing of {len(instances)} {model.__name__} objects failed: {e}")
+    else:
+        if count is None:
+            # The provider call failed (quota, outage, open breaker): every row
+            # backs off; retrying them one by one would only spend more quota
+            return {instance.pk: "Embedding provider call failed" for instance in instances}
+        return {}
+
+    # Isolate the failing objects so one bad row cannot block the rest
+    errors = {}
+    for instance in instances:
+        try:
+            if index_objects([instance], before_batch=throttle_embedding_call) is None:
+                errors[instance.pk] = "Embedding provider call failed"
+        except Exception as e:
+            errors[instance.pk] = e
+    return errors
+
+
+def _claim(batch_size):
+    """
+    Leases up to `batch_size` due rows in a short transaction: the row locks
+    are released before any provider call is made.
+    """
+    with transaction.atomic():
+        rows = list(
+            IndexOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=IndexOutbox.STATUS_PENDING, available_at__lte=timezone.now())
+            .order_by('id')[:batch_size]
+        )
+        if rows:
+            IndexOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                available_at=timezone.now() + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+    return rows
+
+
+def process_outbox_batch(batch_size=100, max_attempts=5):
+    """
+    Claims up to `batch_size` due outbox rows, applies them and deletes the
+    ones that succeeded. Failures are recorded per content type, so a
+    poison batch is retried with backoff instead of being claimed again.
+    Returns the number of rows claimed.
+    """
+    rows = _claim(batch_size)
+    if not rows:
+        return 0
+
+    # Coalesce: the newest row for an object decides whether it is indexed or deleted
+    rows_by_key = {}
+    latest = {}
+    for row in rows:
+        key = (row.content_type_id, row.object_id)
+        rows_by_key.setdefault(key, []).append(row)
+        latest[key] = row.action
+
+    to_index = {}
+    to_delete = {}
+    for (content_type_id, object_id), action in latest.items():
+        target = to_index if action == IndexOutbox.ACTION_INDEX else to_delete
+        target.setdefault(content_type_id, []).append(object_id)
+
+    def group_rows(content_type_id, object_ids):
+        return [row for object_id in object_ids for row in rows_by_key[(content_type_id, object_id)]]
+
+    failed = []
+    for content_type_id, object_ids in to_delete.items():
+        try:
+            delete_entries(SearchIndexEntry.objects.filter(content_type_id=content_type_id, object_id__in=object_ids))
+        except Exception as e:
+            failed.append((group_rows(content_type_id, object_ids), e))
+
+    for content_type_id, object_ids in to_index.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            failed.append((group_rows(content_type_id, object_ids), f"Unknown content type {content_type_id}"))
+            continue
+
+        try:
+            errors = _index_group(model, object_ids)
+        except Exception as e:
+            # e.g. the source query failed: retry the whole group later
+            logger.warning(f"Indexing {len(object_ids)} {model.__name__} objects failed: {e}")
+            failed.append((group_rows(content_type_id, object_ids), e))
+            continue
+        for object_id, error in errors.items():
+            failed.append((rows_by_key[(content_type_id, object_id)], error))
+
+    for failed_rows, error in failed:
+        _mark_failed(failed_rows, error, max_attempts)
+
+    failed_ids = {row.id for failed_rows, _ in failed for row in failed_rows}
+    IndexOutbox.objects.filter(id__in=[row.id for row in rows if row.id not in failed_ids]).delete()
+
+    return len(rows)
@@ -0,0 +1,125 @@
+# search/services/query_cache.py
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+
+    Tier 1 is a per-process LRU with a TTL (no network hop at all).
+    Tier 2 is a shared Django cache so every worker benefits from a vector
+    computed by any other worker.
+    Keys are normalized query strings, namespaced by the embedding model.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, shared_ttl=86400, cache_alias="default",
+                 namespace="", clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self.cache_alias = cache_alias
+        self.namespace = namespace
+        self._clock = clock
+        self._local = OrderedDict()  # key -> (expires_at, vector)
+        self._lock = threading.Lock()
+
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+
+    @staticmethod
+    def normalize(query):
+        return " ".join((query or "").lower().split())
+
+    def _shared_key(self, normalized):
+        digest = hashlib.sha1(f"{self.namespace}\x1f{normalized}".encode("utf-8")).hexdigest()
+        return f"search:qemb:{digest}"
+
+    def _get_local(self, normalized):
+        with self._lock:
+            item = self._local.get(normalized)
+            if item is None:
+                return None
+            expires_at, vector = item
+            if expires_at < self._clock():
+                del self._local[normalized]
+                return None
+            self._local.move_to_end(normalized)
+            return vector
+
+    def _set_local(self, normalized, vector):
+        with self._lock:
+            self._local[normalized] = (self._clock() + self.ttl, vector)
+            self._local.move_to_end(normalized)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, normalized):
+        # The shared tier is an optimisation: never fail a search because of it
+        try:
+            return caches[self.cache_alias].get(self._shared_key(normalized))
+        except Exception as e:
+            logger.warning(f"Query embedding cache read failed: {e}")
+            return None
+
+    def _set_shared(self, normalized, vector):
+        try:
+            caches[self.cache_alias].set(self._shared_key(normalized), vector, self.shared_ttl)
+        except Exception as e:
+            logger.warning(f"Query embedding cache write failed: {e}")
+
+    def get_or_compute(self, query, compute):
+        """
+        Returns the cached vector for `query`, calling `compute(query)` on a
+        miss. Failed computations (None) are not cached.
+        """
+        normalized = self.normalize(query)
+
+        vector = self._get_local(normalized)
+        if vector is not None:
+            self.local_hits += 1
+            return vector
+
+        vector = self._get_shared(normalized)
+        if vector is not None:
+            self.shared_hits += 1
+            self._set_local(normalized, vector)
+            return vector
+
+        self.misses += 1
+        started = time.perf_counter()
+        vector = compute(normalized)
+        self._miss_seconds += time.perf_counter() - started
+
+        if vector is not None:
+            vector = [float(x) for x in vector]
+            self._set_local(normalized, vector)
+            self._set_shared(normalized, vector)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        hits = self.local_hits + self.shared_hits
+        lookups = hits + self.misses
+        avg_miss_ms = (self._miss_seconds * 1000 / self.misses) if self.misses else 0.0
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local_size": len(self._local),
+            "avg_miss_latency_ms": round(avg_miss_ms, 2),
+            "estimated_saved_ms": round(hits * avg_miss_ms, 2),
+        }
@@ -0,0 +1,107 @@
+# search/services/query_logger.py
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import QueryLog
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLogWriter:
+    """
+    Buffers QueryLog rows in memory and writes them with bulk_create from a
+    daemon thread, so a search never waits on an INSERT.
+
+    Rows are flushed every `flush_seconds` or as soon as `batch_size` are
+    queued. When the queue is full (database down or too slow) new rows are
+    dropped and counted instead of blocking requests.
+    """
+
+    def __init__(self, batch_size=100, flush_seconds=2.0, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def log(self, **fields):
+        """Queues one QueryLog row (QueryLog field names as keyword arguments)."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        # Started lazily so forking servers (gunicorn --preload) get a thread per worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="search-query-log", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _drain(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self._flush_lock:
+            try:
+                QueryLog.objects.bulk_create([QueryLog(**fields) for fields in batch])
+                self.written += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"Dropped {len(batch)} query log rows: {e}")
+            finally:
+                # This thread owns its own connection; honour CONN_MAX_AGE
+                close_old_connections()
+
+    def flush(self):
+        """Writes everything queued so far from the calling thread."""
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+query_log_writer = QueryLogWriter(
+    batch_size=getattr(settings, 'SEARCH_QUERY_LOG_BATCH_SIZE', 100),
+    flush_seconds=getattr(settings, 'SEARCH_QUERY_LOG_FLUSH_SECONDS', 2.0),
+    max_queue=getattr(settings, 'SEARCH_QUERY_LOG_MAX_QUEUE', 10000),
+)
+# Best effort: do not lose the last buffered rows on a clean shutdown
+atexit.register(query_log_writer.flush)
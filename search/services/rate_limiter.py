@@ -0,0 +1,47 @@
+# search/services/rate_limiter.py
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Simple token-bucket limiter used to pace calls to the embedding provider.
+
+    The bucket refills continuously at `rate_per_minute` tokens and holds at
+    most `capacity` tokens, so short bursts are allowed while the long-run
+    rate never exceeds the configured quota.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until `tokens` are available and consumes them.
+        Returns the number of seconds spent waiting.
+        """
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
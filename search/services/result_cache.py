@@ -0,0 +1,109 @@
+# search/services/result_cache.py
+import hashlib
+import json
+import logging
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResultCache:
+    """
+    Response-level cache for SearchView.
+
+    Keys combine the normalized request (mode, query, filters, page) with the
+    current generation counter of every content type the request can return.
+    Index writes bump the counters of the content types they touch
+    (bump()), so cached pages for those types are never served again, while
+    pages of other types stay warm. Zero-result responses are cached with a
+    shorter TTL.
+
+    Counters are bumped by whichever process writes the index (usually
+    `search_worker`), so the cache must be shared by every process: with a
+    per-process LocMemCache the response cache stays off.
+    """
+
+    def __init__(self, ttl=60, negative_ttl=10, cache_alias="default"):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.shared
+
+    @property
+    def shared(self):
+        """False for per-process caches, which never see other processes' invalidations."""
+        return not isinstance(caches[self.cache_alias], LocMemCache)
+
+    @staticmethod
+    def _generation_key(content_type_id):
+        return f"search:gen:{content_type_id}"
+
+    def generations(self, content_type_ids):
+        """Current counters of these content types, or None if the cache is unreachable."""
+        keys = [self._generation_key(ct_id) for ct_id in sorted(content_type_ids)]
+        try:
+            values = caches[self.cache_alias].get_many(keys)
+        except Exception as e:
+            logger.warning(f"Search result cache generation read failed: {e}")
+            return None
+        return [values.get(key, 0) for key in keys]
+
+    def bump(self, content_type_ids):
+        """Invalidates every cached response that may contain these content types."""
+        cache = caches[self.cache_alias]
+        for ct_id in set(content_type_ids):
+            key = self._generation_key(ct_id)
+            try:
+                # add() first: incr() fails on a missing key (and must never expire)
+                cache.add(key, 0, None)
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)  # evicted between add() and incr()
+            except Exception as e:
+                logger.warning(f"Search result cache invalidation failed for content type {ct_id}: {e}")
+
+    def make_key(self, content_type_ids, **request):
+        """Cache key for a request, or None (do not cache) when the counters cannot be read."""
+        generations = self.generations(content_type_ids)
+        if generations is None:
+            return None
+        payload = json.dumps(
+            {**request, "query": " ".join(str(request.get("query") or "").lower().split())},
+            sort_keys=True, default=str,
+        )
+        digest = hashlib.sha1(f"{payload}\x1f{generations}".encode("utf-8")).hexdigest()
+        return f"search:result:{digest}"
+
+    def get(self, key):
+        # The cache is an optimisation: never fail a search because of it
+        try:
+            value = caches[self.cache_alias].get(key)
+        except Exception as e:
+            logger.warning(f"Search result cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, response_data, found):
+        try:
+            caches[self.cache_alias].set(key, response_data, self.ttl if found else self.negative_ttl)
+        except Exception as e:
+            logger.warning(f"Search result cache write failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,15 +1,30 @@
 # services/search_services.py
+import hashlib
 import logging
+from django.apps import apps
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from django.core.exceptions import ImproperlyConfigured
+from pgvector import HalfVector
 from pgvector.django import CosineDistance
-import google.generativeai as genai
-from ..models import SearchIndexEntry
+from ..embeddings import get_embedding_provider, reduce_embedding
+from ..models import REDUCED_DIMENSIONS, EmbeddingCache, IndexGeneration, SearchIndexEntry
+from ..repositories.search_repository import _portable_search, fulltext_search
+from ..repositories.vector_index import get_vector_index, vector_index
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .metrics import timed
+from .query_cache import QueryEmbeddingCache
+from .rate_limiter import TokenBucket
+from .result_cache import SearchResultCache
 
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Embedding backend selected by settings.SEARCH_EMBEDDING_PROVIDER (see search/embeddings.py)
+embedding_provider = get_embedding_provider()
 
 # --- CONFIGURATION ---
 # The cutoff score for semantic search.
@@ -21,27 +36,252 @@ genai.configure(api_key=settings.GEMINI_API_KEY)
 # If you get no results often, RAISE this number (e.g., to 0.65).
 SIMILARITY_THRESHOLD = 0.55
 
+# Maximum number of rows returned by a vector search. The ANN index only
+# kicks in for ORDER BY distance ... LIMIT queries, so there is always a limit.
+DEFAULT_SEARCH_LIMIT = 50
+
+# Recall/speed knobs for the approximate-nearest-neighbour indexes.
+# Higher = better recall, slower queries. Can be overridden per request.
+HNSW_EF_SEARCH = getattr(settings, 'SEARCH_HNSW_EF_SEARCH', 64)
+MAX_EF_SEARCH = 1000
+# pgvector >= 0.8: keep scanning the HNSW graph until enough rows pass the
+# filters ("strict_order" / "relaxed_order"), instead of filtering a fixed
+# ef_search candidate list down to too few results. "" (default) leaves it off.
+HNSW_ITERATIVE_SCAN = getattr(settings, 'SEARCH_HNSW_ITERATIVE_SCAN', '')
+
+# "full": search the float32 `embedding` HNSW index directly.
+# "half": generate RERANK_CANDIDATES candidates from the half-precision
+#         `embedding_half` index, then re-rank them with the float32 vectors.
+# "reduced": same, with candidates from the 256-d Matryoshka `embedding_256`
+#         index (fill it with `manage.py reembed_index` before switching).
+VECTOR_STORAGE = getattr(settings, 'SEARCH_VECTOR_STORAGE', 'full')
+RERANK_CANDIDATES = getattr(settings, 'SEARCH_RERANK_CANDIDATES', 200)
+
+# Reciprocal rank fusion constant: score = sum(1 / (RRF_K + rank)).
+# 60 is the value from the original RRF paper and works well without tuning.
+RRF_K = 60
+
+SEARCH_MODES = ("semantic", "lexical", "hybrid")
+
+EMBEDDING_MODEL = embedding_provider.name
+MAX_EMBED_BATCH_SIZE = embedding_provider.max_batch_size
+
+if embedding_provider.dimensions != SearchIndexEntry._meta.get_field('embedding').dimensions:
+    raise ImproperlyConfigured(
+        f"Embedding provider {EMBEDDING_MODEL!r} produces {embedding_provider.dimensions}-d vectors, "
+        f"but SearchIndexEntry.embedding stores {SearchIndexEntry._meta.get_field('embedding').dimensions}-d"
+    )
+
+# Popular queries ("maize", "fertilizer", ...) are embedded once and reused
+query_embedding_cache = QueryEmbeddingCache(
+    maxsize=getattr(settings, 'SEARCH_QUERY_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'SEARCH_QUERY_CACHE_TTL', 3600),
+    shared_ttl=getattr(settings, 'SEARCH_QUERY_CACHE_SHARED_TTL', 86400),
+    cache_alias=getattr(settings, 'SEARCH_QUERY_CACHE_ALIAS', 'default'),
+    namespace=EMBEDDING_MODEL,
+)
+
+# Whole SearchView responses, invalidated per content type by index writes
+result_cache = SearchResultCache(
+    ttl=getattr(settings, 'SEARCH_RESULT_CACHE_TTL', 60),
+    negative_ttl=getattr(settings, 'SEARCH_RESULT_CACHE_NEGATIVE_TTL', 10),
+    cache_alias=getattr(settings, 'SEARCH_QUERY_CACHE_ALIAS', 'default'),
+)
+
+# Guards query-time embedding calls (see get_query_embedding)
+embedding_breaker = CircuitBreaker(
+    f"Embedding provider {EMBEDDING_MODEL}",
+    failure_threshold=getattr(settings, 'SEARCH_EMBED_BREAKER_FAILURES', 5),
+    slow_call_ms=getattr(settings, 'SEARCH_EMBED_BREAKER_SLOW_MS', 1500),
+    reset_seconds=getattr(settings, 'SEARCH_EMBED_BREAKER_RESET_SECONDS', 30),
+)
+
+
+class EmbeddingUnavailable(Exception):
+    """The query could not be embedded: provider error, deadline exceeded or breaker open."""
+
+
+def get_query_embedding(text):
+    """
+    Embeds a search query through embedding_breaker. The provider call is
+    bounded by its query deadline; while the breaker is open no call is made.
+    Raises EmbeddingUnavailable instead of returning None.
+    """
+    try:
+        return embedding_breaker.call(
+            embedding_provider.embed, (text or "").replace("\n", " "), task_type="retrieval_query"
+        )
+    except CircuitOpenError as e:
+        raise EmbeddingUnavailable(str(e)) from e
+    except Exception as e:
+        logger.error(f"Error generating {EMBEDDING_MODEL} query embedding: {e}")
+        raise EmbeddingUnavailable(str(e)) from e
+
 def get_embedding(text, task_type="retrieval_document"):
     """
-    Generates a vector embedding for a given text using Gemini.
+    Generates a vector embedding for a given text using the configured provider.
     """
     try:
         text = text.replace("\n", " ")  # Sanitize
-        
-        result = genai.embed_content(
-            model="models/text-embedding-004", # 768 dimensions
-            content=text,
+        return embedding_provider.embed(text, task_type=task_type)
+    except Exception as e:
+        logger.error(f"Error generating {EMBEDDING_MODEL} embedding: {e}")
+        return None
+
+def get_embeddings_batch(texts, task_type="retrieval_document"):
+    """
+    Generates embeddings for many texts with a single provider batch call.
+    Returns a list aligned with `texts`, or None if the call failed.
+    """
+    if not texts:
+        return []
+
+    if len(texts) > MAX_EMBED_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_EMBED_BATCH_SIZE} texts can be embedded per call")
+
+    try:
+        return embedding_provider.embed_batch(
+            [(text or "").replace("\n", " ") for text in texts],
             task_type=task_type,
-            title="Embedding" if task_type == "retrieval_document" else None
         )
-        return result['embedding']
     except Exception as e:
-        logger.error(f"Error generating Gemini embedding: {e}")
+        logger.error(f"Error generating {EMBEDDING_MODEL} batch embedding: {e}")
         return None
 
-def index_object(instance):
+def indexable_models():
+    """All installed models that opt into search by defining to_search_document()."""
+    return [model for model in apps.get_models() if hasattr(model, 'to_search_document')]
+
+def source_queryset(model):
+    """
+    The model's objects with everything its search documents read joined
+    (`search_select_related`) or prefetched (`search_prefetch_related`).
+    """
+    return model._default_manager.select_related(
+        *getattr(model, 'search_select_related', ())
+    ).prefetch_related(*getattr(model, 'search_prefetch_related', ()))
+
+def iter_chunks(queryset, chunk_size, after_pk=0):
+    """
+    Yields lists of up to `chunk_size` objects in primary key order. Keyset
+    pagination: a fixed number of queries per chunk however deep the table
+    is, and resumable from the last pk seen.
+    """
+    while True:
+        chunk = list(queryset.filter(pk__gt=after_pk).order_by('pk')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        after_pk = chunk[-1].pk
+
+def build_documents(instances):
+    """
+    [(instance, to_search_document())] for the indexable instances, built per
+    model with its batch builder (`to_search_documents`) when it has one.
+    """
+    by_model = {}
+    for instance in instances:
+        if not hasattr(instance, 'to_search_document'):
+            logger.warning(f"Object {instance} does not implement to_search_document()")
+            continue
+        by_model.setdefault(type(instance), []).append(instance)
+
+    documents = []
+    for model, group in by_model.items():
+        if hasattr(model, 'to_search_documents'):
+            documents.extend(zip(group, model.to_search_documents(group)))
+        else:
+            documents.extend((instance, instance.to_search_document()) for instance in group)
+    return documents
+
+def embedding_hash(text, task_type="retrieval_document"):
+    """
+    Stable key for an embedding: changes whenever the model, the task type
+    or the (sanitized) text changes.
+    """
+    text = (text or "").replace("\n", " ")
+    payload = "\x1f".join([EMBEDDING_MODEL, task_type, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+_quota_bucket = None
+
+def throttle_embedding_call(count=1):
+    """
+    Blocks until the provider quota allows another batch call (GEMINI_EMBED_RPM,
+    one token per call, shared by everything in this process). No-op for
+    local providers. Usable as a `before_batch` hook.
+    """
+    global _quota_bucket
+    if not embedding_provider.is_remote:
+        return
+    if _quota_bucket is None:
+        _quota_bucket = TokenBucket(getattr(settings, 'GEMINI_EMBED_RPM', 15), capacity=1)
+    _quota_bucket.acquire()
+
+def get_embeddings_cached(texts, task_type="retrieval_document", before_batch=None):
+    """
+    Like get_embeddings_batch(), but looks every text up in EmbeddingCache
+    first and only sends the misses to the provider (which are then cached).
+    `before_batch(n)` is called before every provider call (rate limiting).
+    Returns a list aligned with `texts`, or None if an embedding call failed.
+    """
+    hashes = [embedding_hash(text, task_type) for text in texts]
+    vectors = dict(
+        EmbeddingCache.objects.filter(content_hash__in=set(hashes))
+        .values_list('content_hash', 'embedding')
+    )
+
+    # Unique texts still missing, keyed by hash
+    missing = {}
+    for content_hash, text in zip(hashes, texts):
+        if content_hash not in vectors:
+            missing.setdefault(content_hash, text)
+
+    missing_items = list(missing.items())
+    for start in range(0, len(missing_items), MAX_EMBED_BATCH_SIZE):
+        chunk = missing_items[start:start + MAX_EMBED_BATCH_SIZE]
+        if before_batch:
+            before_batch(len(chunk))
+        embedded = get_embeddings_batch([text for _, text in chunk], task_type=task_type)
+        if embedded is None:
+            return None
+
+        new_rows = []
+        for (content_hash, _), vector in zip(chunk, embedded):
+            vectors[content_hash] = vector
+            new_rows.append(EmbeddingCache(
+                content_hash=content_hash,
+                model_name=EMBEDDING_MODEL,
+                task_type=task_type,
+                embedding=vector,
+            ))
+        EmbeddingCache.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+    return [vectors.get(content_hash) for content_hash in hashes]
+
+def write_generations(content_type_id):
+    """
+    Generations index writes go to: the active one plus any being built, so
+    a shadow rebuild never misses edits made while it runs.
+    """
+    active, building = IndexGeneration.objects.pointers()
+    return [active.get(content_type_id, 0), *building.get(content_type_id, [])]
+
+def vector_fields(vector):
+    """Values of every stored form of `vector`, tagged with the model that produced it."""
+    return {
+        'embedding': vector,
+        'embedding_half': vector,
+        'embedding_256': reduce_embedding(vector, REDUCED_DIMENSIONS),
+        'embedding_model': EMBEDDING_MODEL,
+    }
+
+def index_object(instance, generations=None):
     """
     Takes a model instance, generates an embedding, and saves/updates it.
+    If the embedded text has not changed since the last index, only the
+    metadata is refreshed and the stored vector is kept.
+    Writes to `generations` (default: write_generations()).
     """
     if not hasattr(instance, 'to_search_document'):
         logger.warning(f"Object {instance} does not implement to_search_document()")
@@ -49,60 +289,314 @@ def index_object(instance):
 
     doc_data = instance.to_search_document()
     text_content = doc_data.get('embedding_text', '')
-    
-    vector = get_embedding(text_content, task_type="retrieval_document")
-
-    if not vector:
-        return
+    content_hash = embedding_hash(text_content, task_type="retrieval_document")
 
     content_type = ContentType.objects.get_for_model(instance)
-    
-    SearchIndexEntry.objects.update_or_create(
+    if generations is None:
+        generations = write_generations(content_type.id)
+    live_generation = IndexGeneration.objects.active_map().get(content_type.id, 0)
+    fields = {
+        'title': doc_data.get('title', str(instance)),
+        'description': doc_data.get('description', ''),
+        'metadata': doc_data,
+        **SearchIndexEntry.filter_values(doc_data),
+    }
+
+    # Fast path: text unchanged (e.g. only status/price/quantity changed)
+    updated = SearchIndexEntry.objects.filter(
         content_type=content_type,
         object_id=instance.id,
-        defaults={
-            'title': doc_data.get('title', str(instance)),
-            'description': doc_data.get('description', ''),
-            'metadata': doc_data,
-            'embedding': vector 
-        }
-    )
+        generation__in=generations,
+        content_hash=content_hash,
+    ).update(updated_at=timezone.now(), **fields)
+    if updated == len(generations):
+        invalidate_results([content_type.id])
+        logger.info(f"Refreshed metadata for {instance} (embedding unchanged)")
+        return
+
+    vectors = get_embeddings_cached([text_content], task_type="retrieval_document")
+    vector = vectors[0] if vectors else None
+
+    if vector is None:
+        return
+
+    for generation in generations:
+        entry, _ = SearchIndexEntry.objects.update_or_create(
+            content_type=content_type,
+            object_id=instance.id,
+            generation=generation,
+            defaults={
+                **fields,
+                **vector_fields(vector),
+                'content_hash': content_hash,
+            }
+        )
+        if generation == live_generation and vector_index.loaded:
+            vector_index.upsert([(entry.pk, vector)])
+    if live_generation in generations:
+        invalidate_results([content_type.id])
     logger.info(f"Successfully indexed {instance}")
 
+def index_objects(instances, generations=None, before_batch=None):
+    """
+    Bulk version of index_object(): embeds every uncached text with batch
+    calls and upserts the entries in a single statement.
+    Writes to `generations` (default: write_generations() of each object).
+    `before_batch(n)` is called before every provider call (e.g. throttle_embedding_call).
+    Returns the number of indexed objects, or None if embedding failed.
+    """
+    documents = build_documents(instances)
+    if not documents:
+        return 0
+
+    texts = [doc_data.get('embedding_text', '') for _, doc_data in documents]
+    vectors = get_embeddings_cached(texts, task_type="retrieval_document", before_batch=before_batch)
+    if vectors is None:
+        return None
+
+    live_generations = IndexGeneration.objects.active_map()
+    target_generations = {}
+    indexed = 0
+    entries = []
+    for (instance, doc_data), text, vector in zip(documents, texts, vectors):
+        if vector is None:
+            continue
+        content_type = ContentType.objects.get_for_model(instance)
+        if content_type.id not in target_generations:
+            target_generations[content_type.id] = (
+                write_generations(content_type.id) if generations is None else generations
+            )
+        indexed += 1
+        for generation in target_generations[content_type.id]:
+            entries.append(SearchIndexEntry(
+                content_type=content_type,
+                object_id=instance.id,
+                generation=generation,
+                title=doc_data.get('title', str(instance)),
+                description=doc_data.get('description', ''),
+                metadata=doc_data,
+                **SearchIndexEntry.filter_values(doc_data),
+                **vector_fields(vector),
+                content_hash=embedding_hash(text, task_type="retrieval_document"),
+            ))
+
+    SearchIndexEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['content_type', 'object_id', 'generation'],
+        update_fields=[
+            'title', 'description', 'metadata', *SearchIndexEntry.FILTER_FIELDS.values(),
+            'embedding', 'embedding_half', 'embedding_256', 'embedding_model', 'content_hash', 'updated_at',
+        ],
+    )
+    # Only the live generation is searchable: shadow writes touch neither
+    # the in-memory index nor cached responses
+    live_entries = [
+        entry for entry in entries
+        if entry.generation == live_generations.get(entry.content_type_id, 0)
+    ]
+    if vector_index.loaded:
+        vector_index.upsert((entry.pk, entry.embedding) for entry in live_entries if entry.pk)
+    invalidate_results(entry.content_type_id for entry in live_entries)
+    logger.info(f"Successfully indexed {indexed} objects")
+    return indexed
+
+def delete_entries(queryset):
+    """Deletes index entries and drops them from the in-memory vector index."""
+    rows = list(queryset.values_list('id', 'content_type_id'))
+    if not rows:
+        return
+    queryset.filter(id__in=[pk for pk, _ in rows]).delete()
+    if vector_index.loaded:
+        vector_index.remove(pk for pk, _ in rows)
+    invalidate_results(content_type_id for _, content_type_id in rows)
+
+def invalidate_results(content_type_ids):
+    """Expires cached search responses for these content types once the write commits."""
+    content_type_ids = set(content_type_ids)
+    if content_type_ids and result_cache.enabled:
+        transaction.on_commit(lambda: result_cache.bump(content_type_ids))
+
 def delete_object_from_index(instance):
     content_type = ContentType.objects.get_for_model(instance)
-    SearchIndexEntry.objects.filter(
+    delete_entries(SearchIndexEntry.objects.filter(
         content_type=content_type, 
         object_id=instance.id
-    ).delete()
+    ))
 
-def search_by_vector(query, filters=None):
+def _set_ann_params(ef_search):
+    """
+    Applies the ANN knobs for the current transaction only (SET LOCAL semantics),
+    so pooled connections never leak them into other requests.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", [str(ef_search)])
+        if HNSW_ITERATIVE_SCAN:
+            cursor.execute("SELECT set_config('hnsw.iterative_scan', %s, true)", [HNSW_ITERATIVE_SCAN])
+
+def search_by_vector(query, filters=None, limit=DEFAULT_SEARCH_LIMIT, ef_search=None, timings=None):
+    """
+    Returns up to `limit` entries closer than SIMILARITY_THRESHOLD, most similar first.
+    `ef_search` (HNSW) trades recall for speed.
+    Milliseconds spent embedding and querying are added to `timings`
+    ("embed", "ann") when a dict is passed.
+    Raises EmbeddingUnavailable when the query vector is neither cached nor
+    obtainable from the provider (callers fall back to search_lexical).
+    """
     if not query:
-        return SearchIndexEntry.objects.none()
+        return []
 
-    # 1. Generate Query Embedding
-    query_vector = get_embedding(query, task_type="retrieval_query")
+    # 1. Generate Query Embedding (served from the query cache when possible,
+    # so popular queries stay semantic even while the breaker is open)
+    with timed(timings, 'embed'):
+        query_vector = query_embedding_cache.get_or_compute(query, get_query_embedding)
     
     if not query_vector:
-        return SearchIndexEntry.objects.none()
+        return []
 
-    # 2. Build Query with Distance Calculation
-    # We use 'alias' to calculate distance for filtering/ordering without 
-    # necessarily attaching it to the final object output (unless you explicitly select it).
-    qs = SearchIndexEntry.objects.alias(
+    # No pgvector here (SQLite, local dev): stay semantic with the in-memory index
+    if connection.vendor != 'postgresql' or getattr(settings, 'SEARCH_VECTOR_BACKEND', 'auto') == 'memory':
+        with timed(timings, 'ann'):
+            return _search_in_memory(query_vector, filters, limit)
+
+    # 2. Apply Metadata Filters (if any)
+    # Filters come from parse_filters_for_queryset(), so hot keys hit the
+    # indexed columns and are applied inside the same ANN scan (iterative scan).
+    # Vectors of another model (mid re-embedding) are never compared.
+    candidates = SearchIndexEntry.objects.live().embedded_with(EMBEDDING_MODEL)
+    if filters:
+        # e.g., filters={'category': 'Vegetables', 'price__lte': 100}
+        candidates = candidates.filter(**filters)
+
+    # HNSW returns at most ef_search candidates, so it can never be below the limit
+    ef_search = max(min(ef_search or HNSW_EF_SEARCH, MAX_EF_SEARCH), limit)
+
+    if VECTOR_STORAGE in ('half', 'reduced'):
+        # 2b. Candidate generation on the compact half-precision (or 256-d)
+        # HNSW index; the exact float32 distance below only re-ranks these.
+        rerank = max(RERANK_CANDIDATES, limit)
+        if VECTOR_STORAGE == 'half':
+            candidate_distance = CosineDistance('embedding_half', HalfVector(query_vector))
+        else:
+            candidate_distance = CosineDistance('embedding_256', reduce_embedding(query_vector, REDUCED_DIMENSIONS))
+        candidate_ids = candidates.order_by(candidate_distance).values('id')[:rerank]
+        candidates = SearchIndexEntry.objects.filter(id__in=candidate_ids)
+        ef_search = max(ef_search, min(rerank, MAX_EF_SEARCH))
+
+    # 3. Build Query with Distance Calculation
+    # 'annotate' (not 'alias') so every returned entry carries its distance
+    # for the serializer, without a second query.
+    qs = candidates.annotate(
         distance=CosineDistance('embedding', query_vector)
     )
 
-    # 3. ✅ APPLY THRESHOLD (The "Cutoff")
+    # 4. ✅ APPLY THRESHOLD (The "Cutoff")
     # This ensures we don't return random, unrelated items.
     qs = qs.filter(distance__lt=SIMILARITY_THRESHOLD)
 
-    # 4. Apply Metadata Filters (if any)
+    # 5. Order by most similar (served by the HNSW index)
+    qs = qs.order_by('distance')[:limit]
+
+    # 6. Evaluate inside the transaction the knobs were set for
+    with timed(timings, 'ann'), transaction.atomic():
+        _set_ann_params(ef_search)
+        return list(qs)
+
+def _search_in_memory(query_vector, filters, limit):
+    """
+    search_by_vector() for databases without pgvector: exact top-k over the
+    process-wide NumPy index, restricted to entries matching `filters`.
+    """
+    candidate_ids = None
     if filters:
-        # e.g., filters={'metadata__category': 'Vegetables'}
-        qs = qs.filter(**filters)
+        candidate_ids = set(
+            SearchIndexEntry.objects.live().embedded_with(EMBEDDING_MODEL).filter(**filters).values_list('id', flat=True)
+        )
 
-    # 5. Order by most similar
-    qs = qs.order_by('distance')
+    hits = [
+        (pk, distance)
+        for pk, distance in get_vector_index().search(query_vector, limit, candidate_ids=candidate_ids)
+        if distance < SIMILARITY_THRESHOLD
+    ]
+    entries = SearchIndexEntry.objects.in_bulk([pk for pk, _ in hits])
 
-    return qs
\ No newline at end of file
+    results = []
+    for pk, distance in hits:
+        if pk in entries:  # skip entries deleted by another process
+            entries[pk].distance = distance
+            results.append(entries[pk])
+    return results
+
+def search_lexical(query, filters=None, limit=DEFAULT_SEARCH_LIMIT, timings=None):
+    """
+    Index-backed full-text search. Needs no embedding provider, so it also
+    answers when Gemini is slow or down. Without Postgres (SQLite, local dev)
+    it falls back to the portable icontains search.
+    """
+    with timed(timings, 'lexical'):
+        if connection.vendor != 'postgresql':
+            if not query:
+                return []
+            # _portable_search consumes the content_type__model key
+            return list(_portable_search(query, dict(filters or {}))[:limit])
+        return fulltext_search(query, filters or {}, limit=limit)
+
+def reciprocal_rank_fusion(*ranked_lists, k=RRF_K):
+    """
+    Merges ranked lists of entries: every entry scores 1 / (k + rank) in each
+    list it appears in. Entries get an `rrf_score` attribute.
+    """
+    scores = {}
+    entries = {}
+    for ranked in ranked_lists:
+        for rank, entry in enumerate(ranked, start=1):
+            scores[entry.pk] = scores.get(entry.pk, 0.0) + 1.0 / (k + rank)
+            entries.setdefault(entry.pk, entry)
+
+    fused = []
+    for pk in sorted(scores, key=lambda pk: (-scores[pk], pk)):
+        entry = entries[pk]
+        entry.rrf_score = scores[pk]
+        fused.append(entry)
+    return fused
+
+def search_hybrid(query, filters=None, limit=DEFAULT_SEARCH_LIMIT, ef_search=None, timings=None):
+    """
+    Runs the vector and the lexical leg and fuses them with reciprocal rank fusion.
+    If the vector leg fails, the lexical results are returned on their own.
+    EmbeddingUnavailable is raised instead, so the caller can flag the
+    response as degraded (and keep it out of caches) before going lexical.
+    """
+    if not query:
+        return []
+
+    # Vector leg first: an unavailable provider costs no lexical query here
+    try:
+        semantic = search_by_vector(
+            query, filters=filters, limit=limit, ef_search=ef_search, timings=timings
+        )
+    except EmbeddingUnavailable:
+        raise
+    except Exception as e:
+        logger.warning(f"Vector leg of hybrid search failed, using lexical results only: {e}")
+        semantic = []
+
+    lexical = search_lexical(query, filters=filters, limit=limit, timings=timings)
+    return reciprocal_rank_fusion(semantic, lexical)[:limit]
+
+def hydrate_entries(entries):
+    """
+    Loads the indexed objects behind a page of entries in one query per
+    model (instead of one per entry), following each model's optional
+    `search_select_related` so that str(obj) needs no extra queries either.
+    Returns the entries as a list.
+    """
+    entries = list(entries)
+    querysets = [
+        model._default_manager.select_related(*getattr(model, 'search_select_related', ()))
+        for model in indexable_models()
+    ]
+    prefetch_related_objects(entries, GenericPrefetch('content_object', querysets))
+    return entries
@@ -0,0 +1,108 @@
+# search/services/suggest_services.py
+import hashlib
+import logging
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
+from ..models import PopularQuery, SearchIndexEntry
+
+logger = logging.getLogger(__name__)
+
+MIN_PREFIX_LENGTH = 2
+MAX_SUGGEST_LIMIT = 20
+
+
+def normalize_query(text):
+    """Lowercased, whitespace-collapsed form used for PopularQuery rows and lookups."""
+    return " ".join((text or "").lower().split())[:200]
+
+
+def _popular_queries(prefix, limit):
+    # Prefix LIKE on the unique column (pattern index on Postgres)
+    return list(
+        PopularQuery.objects.filter(query__startswith=prefix)
+        .order_by('-search_count', 'query')
+        .values_list('query', flat=True)[:limit]
+    )
+
+
+def _title_matches(prefix, limit, model_name=None):
+    qs = SearchIndexEntry.objects.live().exclude(status="inactive")
+    if model_name:
+        qs = qs.filter(content_type__in=ContentType.objects.filter(model__iexact=model_name))
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        # Only word similarity filters: the gin_trgm_ops index on title answers
+        # it (an istartswith OR would compile to UPPER(title) LIKE and force a
+        # scan). It also tolerates typos ("iphnoe" -> "iPhone 13").
+        qs = (
+            qs.filter(title__trigram_word_similar=prefix)
+            .annotate(similarity=TrigramWordSimilarity(prefix, 'title'))
+            .order_by('-similarity', 'title')
+        )
+    else:
+        qs = qs.filter(title__icontains=prefix).order_by('title')
+
+    rows = list(qs.values('object_id', 'content_type__model', 'title')[:limit])
+    # Titles that start with the prefix first; stable, so similarity order holds within each group
+    rows.sort(key=lambda row: not row['title'].lower().startswith(prefix))
+    return rows
+
+
+def suggest(prefix, limit=None, model_name=None):
+    """
+    Completions for a partially typed query, e.g. "iph" -> "iphone 13 pro".
+
+    Popular queries (aggregated from QueryLog) come first, followed by
+    matching entry titles; duplicates are dropped. Only index lookups, no
+    embedding provider call. Results are cached for SEARCH_SUGGEST_CACHE_TTL
+    seconds. Returns [{"text", "kind", "type", "object_id"}].
+    """
+    prefix = normalize_query(prefix)
+    limit = max(1, min(limit or getattr(settings, 'SEARCH_SUGGEST_LIMIT', 8), MAX_SUGGEST_LIMIT))
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return []
+
+    ttl = getattr(settings, 'SEARCH_SUGGEST_CACHE_TTL', 30)
+    digest = hashlib.sha256(prefix.encode()).hexdigest()[:32]
+    cache_key = f"search:suggest:{(model_name or '*').lower()}:{limit}:{digest}"
+    cache = caches['default']
+    if ttl > 0:
+        # The cache is an optimisation: never fail a suggestion because of it
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Suggest cache read failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+
+    suggestions = []
+    seen = set()
+
+    def add(text, kind, model=None, object_id=None):
+        key = normalize_query(text)
+        if key in seen or len(suggestions) >= limit:
+            return
+        seen.add(key)
+        suggestions.append({"text": text, "kind": kind, "type": model, "object_id": object_id})
+
+    # Popular queries get at most half of the slots unless titles run short
+    popular = _popular_queries(prefix, limit)
+    titles = _title_matches(prefix, limit, model_name)
+    for text in popular[:(limit + 1) // 2]:
+        add(text, "query")
+    for row in titles:
+        add(row['title'], "title", row['content_type__model'], row['object_id'])
+    for text in popular[(limit + 1) // 2:]:
+        add(text, "query")
+
+    if ttl > 0:
+        try:
+            cache.set(cache_key, suggestions, ttl)
+        except Exception as e:
+            logger.warning(f"Suggest cache write failed: {e}")
+    return suggestions
@@ -0,0 +1,121 @@
+# search/services/sync_services.py
+import logging
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.utils import timezone
+from ..models import IndexSyncState, SearchIndexEntry
+from .search_services import build_documents, delete_entries, index_objects, iter_chunks, source_queryset
+
+logger = logging.getLogger(__name__)
+
+# Rows committed slightly out of updated_at order (long transactions, clock
+# skew between app servers) are caught by re-checking this window every run
+WATERMARK_OVERLAP = timedelta(minutes=2)
+SWEEP_BATCH_SIZE = 1000
+
+
+class IndexSyncError(Exception):
+    pass
+
+
+def _has_updated_at(model):
+    try:
+        model._meta.get_field('updated_at')
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _index_stale(content_type, batch, before_batch, compare_documents=False):
+    """
+    Indexes the objects of `batch` whose live entry is missing or older than
+    the object or, with `compare_documents`, no longer matches its document.
+    """
+    live = SearchIndexEntry.objects.live().filter(content_type=content_type)
+    entry_times = dict(live.filter(object_id__in=[obj.pk for obj in batch]).values_list('object_id', 'updated_at'))
+    stale = [
+        obj for obj in batch
+        if obj.pk not in entry_times or getattr(obj, 'updated_at', None) is None
+        or entry_times[obj.pk] < obj.updated_at
+    ]
+    if compare_documents:
+        # QuerySet.update() and raw SQL leave updated_at (auto_now) untouched:
+        # compare the stored document with a freshly built one instead
+        stale_ids = {obj.pk for obj in stale}
+        current = [obj for obj in batch if obj.pk not in stale_ids]
+        stored = dict(live.filter(object_id__in=[obj.pk for obj in current]).values_list('object_id', 'metadata'))
+        stale += [obj for obj, document in build_documents(current) if document != stored.get(obj.pk)]
+    if not stale:
+        return 0
+    # Throttled per provider call: objects whose text is already embedded cost none
+    if index_objects(stale, before_batch=before_batch) is None:
+        raise IndexSyncError(f"Embedding failed for {len(stale)} {content_type.model} objects")
+    return len(stale)
+
+
+def sync_model(model, batch_size=100, full=False, sweep=True, before_batch=None):
+    """
+    Brings the index of `model` in line with its table without a rebuild:
+
+    1. objects updated since the stored watermark are re-indexed if their
+       entry is older (keyset batches on (updated_at, pk));
+    2. objects that have no live entry at all are indexed;
+    3. entries whose object no longer exists are deleted (`sweep`).
+
+    `full` ignores the watermark and also re-indexes objects whose entry no
+    longer matches their search document (edits that did not touch
+    updated_at). `before_batch(n)` is called before every embedding call
+    (rate limiting). Returns {"indexed": n, "deleted": n}.
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    state, _ = IndexSyncState.objects.get_or_create(content_type=content_type)
+    started = timezone.now()
+    source = source_queryset(model)
+    indexed = deleted = 0
+
+    # 1. Changed since the last run
+    if _has_updated_at(model):
+        changed = source
+        if state.watermark is not None and not full:
+            changed = changed.filter(updated_at__gte=state.watermark - WATERMARK_OVERLAP)
+        last = None
+        while True:
+            page = changed
+            if last is not None:
+                page = page.filter(Q(updated_at__gt=last[0]) | Q(updated_at=last[0], pk__gt=last[1]))
+            batch = list(page.order_by('updated_at', 'pk')[:batch_size])
+            if not batch:
+                break
+            indexed += _index_stale(content_type, batch, before_batch, compare_documents=full)
+            last = (batch[-1].updated_at, batch[-1].pk)
+            # Saved per batch so an interrupted run resumes from here
+            if state.watermark is None or last[0] > state.watermark:
+                state.watermark = last[0]
+                state.save(update_fields=['watermark'])
+
+    # 2. Never indexed (e.g. created through bulk_create, which sends no signals)
+    live_ids = SearchIndexEntry.objects.live().filter(content_type=content_type).values('object_id')
+    for batch in iter_chunks(source.exclude(pk__in=live_ids), batch_size):
+        indexed += _index_stale(content_type, batch, before_batch)
+
+    # 3. Orphans: objects deleted without post_delete (raw SQL, other services
+    # writing to the table, restored backups) or while no receiver was connected
+    if sweep:
+        orphans = SearchIndexEntry.objects.filter(content_type=content_type).exclude(
+            object_id__in=model._default_manager.values('pk')
+        )
+        while True:
+            ids = list(orphans.values_list('id', flat=True)[:SWEEP_BATCH_SIZE])
+            if not ids:
+                break
+            delete_entries(SearchIndexEntry.objects.filter(id__in=ids))
+            deleted += len(ids)
+
+    state.last_run_at = started
+    state.last_indexed = indexed
+    state.last_deleted = deleted
+    state.save(update_fields=['last_run_at', 'last_indexed', 'last_deleted'])
+    logger.info(f"Synced {model.__name__} index: {indexed} indexed, {deleted} orphans deleted")
+    return {"indexed": indexed, "deleted": deleted}
@@ -1,20 +1,17 @@
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from .services.search_services import index_object, delete_object_from_index
+from .services.outbox_services import enqueue_delete, enqueue_index
 
-from teseapi.models import Listing 
 
+# Connected in SearchConfig.ready() for every model with to_search_document().
+# Indexing itself happens in `manage.py search_worker` after the transaction commits.
 
-@receiver(post_save, sender=Listing)
-def auto_index_listing(sender, instance, **kwargs):
+def auto_index(sender, instance, **kwargs):
     """
-    Triggered whenever a Listing is created or updated.
+    Triggered whenever an indexable object is created or updated.
     """
-    index_object(instance)
+    enqueue_index(instance)
 
-@receiver(post_delete, sender=Listing)
-def auto_delete_listing_index(sender, instance, **kwargs):
+def auto_delete(sender, instance, **kwargs):
     """
-    Triggered whenever a Listing is deleted.
+    Triggered whenever an indexable object is deleted.
     """
-    delete_object_from_index(instance)
\ No newline at end of file
+    enqueue_delete(instance)
@@ -1,3 +1,545 @@
-from django.test import TestCase
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, PropertyMock, patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from products.models import Listing
+
+from .repositories.search_repository import parse_filters_for_queryset, search_index
+from .repositories.vector_index import InMemoryVectorIndex
+from .embeddings import HashingEmbeddingProvider
+from .models import IndexGeneration, IndexJob, IndexOutbox, PopularQuery, SearchIndexEntry
+from .services import search_services
+from .services.outbox_services import process_outbox_batch
+from .services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from .services.generation_services import collect_garbage, promote_generation, start_generation
+from .services.job_services import MAX_JOB_ATTEMPTS, enqueue_job, process_job_chunk
+from .services.rate_limiter import TokenBucket
+from .services.result_cache import SearchResultCache
+from .services.suggest_services import suggest
+from .services.sync_services import sync_model
+from .services.search_services import reciprocal_rank_fusion
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _fail():
+    raise RuntimeError("provider down")
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=30, clock=self.clock)
+
+    def _trip(self):
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.breaker.call(_fail)
+
+    def test_opens_after_consecutive_failures(self):
+        self._trip()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: "ok")
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_success_resets_the_failure_count(self):
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(_fail)
+        self.breaker.call(lambda: "ok")
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(_fail)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_success_closes(self):
+        self._trip()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial_failure_reopens(self):
+        self._trip()
+        self.clock.now += 30
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(_fail)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.trips, 2)
+
+    def test_slow_success_counts_as_failure(self):
+        breaker = CircuitBreaker("slow", failure_threshold=1, slow_call_ms=100, clock=self.clock)
+
+        def slow():
+            self.clock.now += 0.5
+            return "ok"
+
+        self.assertEqual(breaker.call(slow), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_burst_up_to_capacity_does_not_wait(self):
+        bucket = TokenBucket(60, capacity=3, clock=self.clock, sleep=self.clock.sleep)
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+
+    def test_waits_for_refill_when_empty(self):
+        bucket = TokenBucket(60, capacity=1, clock=self.clock, sleep=self.clock.sleep)
+        bucket.acquire()
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(60, capacity=2, clock=self.clock, sleep=self.clock.sleep)
+        bucket.acquire(2)
+        self.clock.now += 100
+        self.assertEqual(bucket.acquire(2), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 1.0)
+
+    def test_rejects_non_positive_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+
+class ReciprocalRankFusionTests(SimpleTestCase):
+
+    def test_entries_in_both_lists_rank_first(self):
+        a, b, c, d = (SimpleNamespace(pk=pk) for pk in (1, 2, 3, 4))
+        fused = reciprocal_rank_fusion([a, b, c], [c, d], k=60)
+        self.assertEqual([entry.pk for entry in fused], [3, 1, 2, 4])
+        self.assertAlmostEqual(fused[0].rrf_score, 1 / 63 + 1 / 61)
+
+    def test_ties_are_broken_by_pk(self):
+        fused = reciprocal_rank_fusion([SimpleNamespace(pk=9)], [SimpleNamespace(pk=5)])
+        self.assertEqual([entry.pk for entry in fused], [5, 9])
+
+    def test_empty_lists(self):
+        self.assertEqual(reciprocal_rank_fusion([], []), [])
+
+
+class InMemoryVectorIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = InMemoryVectorIndex(dimensions=3)
+        self.index.upsert([(1, [1, 0, 0]), (2, [0, 1, 0]), (3, [1, 1, 0]), (4, [0, 0, 1])])
+
+    def test_top_k_closest_first(self):
+        hits = self.index.search([1, 0.1, 0], k=2)
+        self.assertEqual([pk for pk, _ in hits], [1, 3])
+        self.assertLess(hits[0][1], hits[1][1])
+
+    def test_candidate_ids_restrict_the_search(self):
+        hits = self.index.search([1, 0, 0], k=2, candidate_ids=[2, 4, 99])
+        self.assertEqual(sorted(pk for pk, _ in hits), [2, 4])
+
+    def test_upsert_replaces_and_remove_drops(self):
+        self.index.upsert([(4, [1, 0, 0])])
+        self.index.remove([1])
+        self.assertEqual(len(self.index), 3)
+        pk, distance = self.index.search([1, 0, 0], k=1)[0]
+        self.assertEqual(pk, 4)
+        self.assertAlmostEqual(distance, 0.0, places=6)
+
+
+class ParseFiltersTests(SimpleTestCase):
+
+    def test_filter_keys_use_typed_columns(self):
+        parsed = parse_filters_for_queryset({
+            "metadata__price__lte": "100",
+            "metadata__category": "seed",
+            "metadata__sellerId": "7",
+        })
+        self.assertEqual(parsed, {"price__lte": 100, "category": "seed", "seller_id": 7})
+
+    def test_other_metadata_keys_stay_json_lookups(self):
+        self.assertEqual(parse_filters_for_queryset({"metadata__unit": "kg"}), {"metadata__unit": "kg"})
+
+    def test_numbers_are_coerced(self):
+        parsed = parse_filters_for_queryset({"metadata__weight__gte": "2.5"})
+        self.assertEqual(parsed, {"metadata__weight__gte": 2.5})
+
+    def test_content_type_is_lowercased_and_unknown_keys_dropped(self):
+        parsed = parse_filters_for_queryset({"content_type__model": "Listing", "page": "2"})
+        self.assertEqual(parsed, {"content_type__model": "listing"})
+
+
+def _listing(name, **fields):
+    user, _ = get_user_model().objects.get_or_create(username="seller", defaults={"location": "Harare"})
+    fields = {"listing_type": "product", "location": "Harare", "price": 10, **fields}
+    return Listing.objects.create(user=user, name=name, **fields)
+
+
+class OfflineEmbeddingsMixin:
+    """Embeds with the offline hashing provider instead of calling Gemini."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(search_services, "embedding_provider", HashingEmbeddingProvider(dimensions=768))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class IndexJobTests(TestCase):
+
+    def setUp(self):
+        self.listing = _listing("Tomato seeds")
+
+    def test_chunk_error_is_counted_and_backs_off(self):
+        job = enqueue_job(IndexJob.KIND_BULK, Listing)
+        with patch("search.services.job_services.index_objects", side_effect=RuntimeError("bad row")):
+            self.assertEqual(process_job_chunk(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IndexJob.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("bad row", job.error)
+        self.assertIsNotNone(job.leased_until)
+        self.assertEqual(job.last_pk, 0)
+
+    def test_backing_off_job_does_not_block_later_jobs(self):
+        failing = enqueue_job(IndexJob.KIND_BULK, Listing)
+        later = enqueue_job(IndexJob.KIND_BULK, Listing)
+        with patch("search.services.job_services.index_objects", return_value=None):
+            process_job_chunk()
+        with patch("search.services.job_services.index_objects", return_value=1) as index_objects:
+            self.assertEqual(process_job_chunk(), 1)
+
+        later.refresh_from_db()
+        self.assertEqual((later.processed, later.indexed, later.last_pk), (1, 1, self.listing.pk))
+        self.assertEqual(index_objects.call_count, 1)
+        failing.refresh_from_db()
+        self.assertEqual(failing.last_pk, 0)
+
+    def test_fails_after_max_attempts(self):
+        job = enqueue_job(IndexJob.KIND_BULK, Listing)
+        with patch("search.services.job_services.index_objects", return_value=None):
+            for _ in range(MAX_JOB_ATTEMPTS):
+                IndexJob.objects.filter(pk=job.pk).update(leased_until=None)
+                process_job_chunk()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IndexJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, MAX_JOB_ATTEMPTS)
+
+    def test_job_succeeds_after_last_chunk(self):
+        job = enqueue_job(IndexJob.KIND_BULK, Listing)
+        with patch("search.services.job_services.index_objects", return_value=1):
+            self.assertEqual(process_job_chunk(), 1)
+            self.assertEqual(process_job_chunk(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IndexJob.STATUS_SUCCEEDED)
+        self.assertIsNone(job.leased_until)
+
+
+class OutboxTests(OfflineEmbeddingsMixin, TestCase):
+
+    def test_rows_are_recorded_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            listing = _listing("Maize seed")
+        self.assertFalse(IndexOutbox.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        row = IndexOutbox.objects.get()
+        self.assertEqual((row.object_id, row.action), (listing.pk, IndexOutbox.ACTION_INDEX))
+
+    def test_drain_indexes_and_deletes_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = _listing("Maize seed")
+        self.assertEqual(process_outbox_batch(), 1)
+
+        self.assertFalse(IndexOutbox.objects.exists())
+        entry = SearchIndexEntry.objects.get(object_id=listing.pk)
+        self.assertEqual(entry.title, "Maize seed")
+        self.assertIsNotNone(entry.embedding)
+
+    def test_delete_wins_over_earlier_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = _listing("Maize seed")
+        process_outbox_batch()
+        with self.captureOnCommitCallbacks(execute=True):
+            listing.save()
+            listing.delete()
+
+        self.assertEqual(process_outbox_batch(), 2)
+        self.assertFalse(SearchIndexEntry.objects.exists())
+
+    def test_provider_failure_backs_off_every_row_without_per_row_calls(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name in ("Maize seed", "Bean seed", "Onion seed"):
+                _listing(name)
+
+        with patch("search.services.outbox_services.index_objects", return_value=None) as index_objects:
+            self.assertEqual(process_outbox_batch(), 3)
+
+        self.assertEqual(index_objects.call_count, 1)
+        for row in IndexOutbox.objects.all():
+            self.assertEqual(row.attempts, 1)
+            self.assertEqual(row.status, IndexOutbox.STATUS_PENDING)
+            self.assertGreater(row.available_at, row.created_at)
+
+    def test_bulk_error_isolates_the_bad_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            good, bad = _listing("Maize seed"), _listing("Bean seed")
+
+        def index_objects(instances, **kwargs):
+            if any(instance.pk == bad.pk for instance in instances):
+                raise ValueError("bad document")
+            return len(instances)
+
+        with patch("search.services.outbox_services.index_objects", side_effect=index_objects):
+            process_outbox_batch()
+
+        row = IndexOutbox.objects.get()
+        self.assertEqual((row.object_id, row.attempts), (bad.pk, 1))
+
+
+class ResultCacheTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.listing = _listing("Maize seed")
+        self.content_type = ContentType.objects.get_for_model(Listing)
+
+    def test_off_on_a_process_local_cache(self):
+        self.assertFalse(SearchResultCache(ttl=60).enabled)
+
+    def test_index_write_invalidates_cached_responses(self):
+        with patch.object(SearchResultCache, "shared", new_callable=PropertyMock, return_value=True):
+            result_cache = search_services.result_cache
+            key = result_cache.make_key([self.content_type.id], query="maize", mode="hybrid")
+            result_cache.set(key, {"results": []}, True)
+            self.assertEqual(result_cache.get(key), {"results": []})
+
+            with self.captureOnCommitCallbacks(execute=True):
+                search_services.index_objects([self.listing])
+
+            new_key = result_cache.make_key([self.content_type.id], query="maize", mode="hybrid")
+            self.assertNotEqual(new_key, key)
+            self.assertIsNone(result_cache.get(new_key))
+
+    def test_other_content_types_stay_cached(self):
+        cache = SearchResultCache(ttl=60)
+        key = cache.make_key([self.content_type.id + 1], query="maize")
+        cache.bump([self.content_type.id])
+        self.assertEqual(cache.make_key([self.content_type.id + 1], query="maize"), key)
+
+    def test_unreachable_cache_disables_caching(self):
+        cache = SearchResultCache(ttl=60)
+        with patch("django.core.cache.backends.locmem.LocMemCache.get_many", side_effect=ConnectionError):
+            self.assertIsNone(cache.make_key([self.content_type.id], query="maize"))
+
+
+class InMemoryVectorIndexSyncTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_services.index_objects([_listing("Maize seed"), _listing("Bean seed")])
+        self.index = InMemoryVectorIndex(dimensions=768, model_name=search_services.EMBEDDING_MODEL)
+        self.index.load_from_db()
+
+    def test_refresh_drops_entries_deleted_elsewhere(self):
+        gone = SearchIndexEntry.objects.get(title="Bean seed")
+        SearchIndexEntry.objects.filter(pk=gone.pk).delete()
+        self.index.refresh()
+
+        self.assertEqual(len(self.index), 1)
+        self.assertNotIn(gone.pk, [pk for pk, _ in self.index.search(gone.embedding, 5)])
+
+    def test_refresh_picks_up_new_entries(self):
+        search_services.index_objects([_listing("Onion seed")])
+        entry = SearchIndexEntry.objects.get(title="Onion seed")
+        self.index.refresh()
+
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search(entry.embedding, 1)[0][0], entry.pk)
+
+
+class SearchIndexInMemoryTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_services.index_objects([_listing("Maize seed"), _listing("Bean seed")])
+        index = InMemoryVectorIndex(dimensions=768, model_name=search_services.EMBEDDING_MODEL)
+        index.load_from_db()
+        patcher = patch.object(search_services, "get_vector_index", return_value=index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_closest_entry_first(self):
+        self.assertEqual(search_index("Maize seed", {}).first().title, "Maize seed")
+
+    def test_unrelated_entries_are_cut_off(self):
+        self.assertEqual(list(search_index("Maize seed", {})), [SearchIndexEntry.objects.get(title="Maize seed")])
+
+    def test_entries_of_another_embedding_model_are_skipped(self):
+        SearchIndexEntry.objects.filter(title="Maize seed").update(embedding_model="other-model")
+        titles = [entry.title for entry in search_index("Maize seed", {"content_type__model": "Listing"})]
+        self.assertNotIn("Maize seed", titles)
+
+
+class IndexGenerationTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        IndexGeneration.objects.clear_cache()
+        self.addCleanup(IndexGeneration.objects.clear_cache)
+        self.listing = _listing("Maize seed")
+        search_services.index_objects([self.listing])
+        self.content_type = ContentType.objects.get_for_model(Listing)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.generation = start_generation(self.content_type)
+
+    def live_titles(self):
+        return list(SearchIndexEntry.objects.live().values_list("title", flat=True))
+
+    def test_writes_during_a_build_go_to_both_generations(self):
+        self.listing.name = "Yellow maize seed"
+        search_services.index_objects([self.listing])
+
+        entries = SearchIndexEntry.objects.filter(object_id=self.listing.pk)
+        self.assertEqual(sorted(entries.values_list("generation", flat=True)), [0, self.generation.number])
+        self.assertEqual(self.live_titles(), ["Yellow maize seed"])
+
+    def test_shadow_generation_is_searched_only_once_promoted(self):
+        self.listing.name = "Yellow maize seed"
+        search_services.index_objects([self.listing], generations=[self.generation.number])
+        self.assertEqual(self.live_titles(), ["Maize seed"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            promote_generation(self.generation)
+        self.assertEqual(self.live_titles(), ["Yellow maize seed"])
+        self.assertEqual(
+            IndexGeneration.objects.get(content_type=self.content_type, number=0).state,
+            IndexGeneration.STATE_RETIRED,
+        )
+
+    def test_garbage_collection_waits_for_every_process_to_see_the_swap(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            promote_generation(self.generation)
+        self.assertEqual(collect_garbage(), 0)
+        self.assertTrue(SearchIndexEntry.objects.filter(generation=0).exists())
+
+        IndexGeneration.objects.filter(number=0).update(retired_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(collect_garbage(), 1)
+        self.assertEqual(collect_garbage(), 0)
+        self.assertFalse(SearchIndexEntry.objects.filter(generation=0).exists())
+        self.assertFalse(IndexGeneration.objects.filter(number=0).exists())
+
+
+@override_settings(SEARCH_QUERY_LOG_ENABLED=False)
+class SearchPaginationTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_services.index_objects([_listing(f"Maize seed {n}") for n in range(5)])
+
+    def search(self, **params):
+        response = self.client.get(reverse("search"), {"q": "maize", "mode": "lexical", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_walks_every_result_once(self):
+        titles, cursor = [], ""
+        for _ in range(3):
+            page = self.search(limit=2, cursor=cursor)
+            titles += [result["title"] for result in page["results"]]
+            cursor = page["next_cursor"]
+        self.assertIsNone(cursor)
+        self.assertEqual(sorted(titles), [f"Maize seed {n}" for n in range(5)])
+
+    @override_settings(SEARCH_MAX_RESULTS=3)
+    def test_results_stop_at_max_results(self):
+        first = self.search(limit=2)
+        second = self.search(limit=2, cursor=first["next_cursor"])
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next_cursor"])
+
+    def test_invalid_cursor_starts_from_the_top(self):
+        self.assertEqual(self.search(limit=2, cursor="not-a-cursor")["results"], self.search(limit=2)["results"])
+
+
+class SyncTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Created without indexing: the outbox only runs on commit
+        self.maize, self.bean = _listing("Maize seed"), _listing("Bean seed")
+        sync_model(Listing)
+
+    def test_indexes_missing_rows_then_only_changed_ones(self):
+        self.assertEqual(SearchIndexEntry.objects.count(), 2)
+        self.assertEqual(sync_model(Listing), {"indexed": 0, "deleted": 0})
+
+        self.maize.name = "Yellow maize seed"
+        self.maize.save()
+        self.assertEqual(sync_model(Listing)["indexed"], 1)
+        self.assertEqual(SearchIndexEntry.objects.get(object_id=self.maize.pk).title, "Yellow maize seed")
+
+    def test_full_sync_catches_queryset_updates(self):
+        Listing.objects.filter(pk=self.maize.pk).update(price=99)
+        self.assertEqual(sync_model(Listing)["indexed"], 0)
+
+        self.assertEqual(sync_model(Listing, full=True)["indexed"], 1)
+        self.assertEqual(SearchIndexEntry.objects.get(object_id=self.maize.pk).price, 99)
+
+    def test_unchanged_text_costs_no_provider_call(self):
+        self.maize.price = 99
+        self.maize.save()
+        before_batch = Mock()
+        self.assertEqual(sync_model(Listing, before_batch=before_batch)["indexed"], 1)
+        before_batch.assert_not_called()
+
+    def test_entries_of_deleted_objects_are_swept(self):
+        Listing.objects.filter(pk=self.bean.pk).delete()
+        self.assertEqual(sync_model(Listing)["deleted"], 1)
+        self.assertFalse(SearchIndexEntry.objects.filter(object_id=self.bean.pk).exists())
+
+
+@override_settings(SEARCH_SUGGEST_CACHE_TTL=0)
+class SuggestTests(OfflineEmbeddingsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        search_services.index_objects([
+            _listing("Tomato seedlings"), _listing("Cherry tomatoes"), _listing("Tomato sauce", status="inactive"),
+        ])
+        PopularQuery.objects.create(query="tomato seeds", search_count=5, last_searched_at=timezone.now())
+
+    def texts(self, prefix, **kwargs):
+        return [suggestion["text"] for suggestion in suggest(prefix, **kwargs)]
+
+    def test_popular_queries_then_titles_starting_with_the_prefix(self):
+        self.assertEqual(self.texts("Tom"), ["tomato seeds", "Tomato seedlings", "Cherry tomatoes"])
+
+    def test_title_suggestions_identify_their_object(self):
+        suggestion = suggest("cherry")[0]
+        self.assertEqual((suggestion["kind"], suggestion["type"]), ("title", "listing"))
+        self.assertEqual(suggestion["object_id"], Listing.objects.get(name="Cherry tomatoes").pk)
+
+    def test_short_prefixes_and_other_types_suggest_nothing(self):
+        self.assertEqual(suggest("t"), [])
+        self.assertEqual(self.texts("tom", model_name="service"), ["tomato seeds"])
+
+    def test_limit_caps_the_suggestions(self):
+        self.assertEqual(self.texts("tom", limit=1), ["tomato seeds"])
@@ -8,5 +8,6 @@ router.register(r'index-admin', search_views.IndexAdminViewSet, basename='index-
 
 urlpatterns = [
     path('search/', search_views.SearchView.as_view(), name='search'),
+    path('suggest/', search_views.SuggestView.as_view(), name='search-suggest'),
     path('', include(router.urls)), # Includes all the admin-only URLs
 ]
\ No newline at end of file
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Your apps
     "teseapi",
     "pgvector.django",
@@ -201,6 +202,112 @@ PAYNOW_SECRET_KEY = os.environ.get("PAYNOW_SECRET_KEY")
 PAYNOW_INTEGRATION_ID = os.environ.get("PAYNOW_INTEGRATION_ID")
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# ----------------------
+# Search / Embeddings
+# ----------------------
+# "gemini" (default), "hashing" (offline NumPy vectorizer for CI, load tests and
+# local rebuilds) or the dotted path of a search.embeddings.EmbeddingProvider subclass
+SEARCH_EMBEDDING_PROVIDER = os.environ.get("SEARCH_EMBEDDING_PROVIDER", "gemini")
+
+# Quota used to pace bulk embedding jobs (e.g. `manage.py reindex`).
+# GEMINI_EMBED_DOCS_PER_MINUTE = 0 disables the per-document limit.
+GEMINI_EMBED_RPM = int(os.environ.get("GEMINI_EMBED_RPM", 15))
+GEMINI_EMBED_DOCS_PER_MINUTE = int(os.environ.get("GEMINI_EMBED_DOCS_PER_MINUTE", 0))
+GEMINI_EMBED_BATCH_SIZE = int(os.environ.get("GEMINI_EMBED_BATCH_SIZE", 100))
+
+# Deadlines (seconds) for Gemini calls: query embeddings block a search
+# request, batch embeddings only a background job
+GEMINI_EMBED_QUERY_TIMEOUT = float(os.environ.get("GEMINI_EMBED_QUERY_TIMEOUT", 2))
+GEMINI_EMBED_BATCH_TIMEOUT = float(os.environ.get("GEMINI_EMBED_BATCH_TIMEOUT", 30))
+# Query embedding circuit breaker: opens after this many consecutive failed or
+# slow calls and sends searches to the lexical index until a trial call succeeds
+SEARCH_EMBED_BREAKER_FAILURES = int(os.environ.get("SEARCH_EMBED_BREAKER_FAILURES", 5))
+SEARCH_EMBED_BREAKER_SLOW_MS = float(os.environ.get("SEARCH_EMBED_BREAKER_SLOW_MS", 1500))
+SEARCH_EMBED_BREAKER_RESET_SECONDS = float(os.environ.get("SEARCH_EMBED_BREAKER_RESET_SECONDS", 30))
+
+# Index writes through the outbox drained by `manage.py search_worker`.
+# Set SEARCH_INDEX_ASYNC=False to index right after commit instead (no worker needed).
+SEARCH_INDEX_ASYNC = str(os.environ.get("SEARCH_INDEX_ASYNC", "True")).lower() in ("1", "true", "yes")
+
+# Default /api/search/search/ mode: "semantic", "lexical" or "hybrid"
+SEARCH_DEFAULT_MODE = os.environ.get("SEARCH_DEFAULT_MODE", "hybrid")
+
+# Search pagination: default/maximum page size and the deepest result reachable
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", 12))
+SEARCH_MAX_PAGE_SIZE = int(os.environ.get("SEARCH_MAX_PAGE_SIZE", 50))
+SEARCH_MAX_RESULTS = int(os.environ.get("SEARCH_MAX_RESULTS", 200))
+
+# Random "discover" fallback: per-type id pool size and refresh interval;
+# tables above SEARCH_DISCOVERY_TABLESAMPLE_ROWS are sampled with TABLESAMPLE
+SEARCH_DISCOVERY_POOL_SIZE = int(os.environ.get("SEARCH_DISCOVERY_POOL_SIZE", 2000))
+SEARCH_DISCOVERY_REFRESH_SECONDS = int(os.environ.get("SEARCH_DISCOVERY_REFRESH_SECONDS", 300))
+SEARCH_DISCOVERY_TABLESAMPLE_ROWS = int(os.environ.get("SEARCH_DISCOVERY_TABLESAMPLE_ROWS", 100000))
+
+# ANN recall/speed knobs (applied per query with SET LOCAL)
+SEARCH_HNSW_EF_SEARCH = int(os.environ.get("SEARCH_HNSW_EF_SEARCH", 64))
+# Filtered HNSW scans: "strict_order", "relaxed_order" or "" (off, the default).
+# Needs pgvector >= 0.8 (older versions reject the setting). Combined with the
+# similarity threshold, a query with few matches keeps scanning until
+# hnsw.max_scan_tuples (20000 by default), so enable it only after measuring.
+SEARCH_HNSW_ITERATIVE_SCAN = os.environ.get("SEARCH_HNSW_ITERATIVE_SCAN", "")
+
+# Vector storage used for candidate generation: "full" (float32 HNSW index),
+# "half" (halfvec HNSW index) or "reduced" (256-d Matryoshka HNSW index); the
+# latter two re-rank the top SEARCH_RERANK_CANDIDATES at full precision. Their
+# indexes are built in addition to the float32 one (more disk, not less); the
+# gain is a smaller index for searches to keep hot. Check recall with
+# `manage.py vector_recall_report`; fill embedding_256 with `manage.py reembed_index`.
+SEARCH_VECTOR_STORAGE = os.environ.get("SEARCH_VECTOR_STORAGE", "full")
+SEARCH_RERANK_CANDIDATES = int(os.environ.get("SEARCH_RERANK_CANDIDATES", 200))
+
+# Vector search backend: "auto" (pgvector on Postgres, in-memory NumPy index
+# elsewhere) or "memory" (always the in-memory index). The in-memory index can be
+# memory-mapped from a snapshot written by `manage.py build_vector_index`.
+SEARCH_VECTOR_BACKEND = os.environ.get("SEARCH_VECTOR_BACKEND", "auto")
+SEARCH_VECTOR_INDEX_PATH = os.environ.get("SEARCH_VECTOR_INDEX_PATH") or None
+SEARCH_VECTOR_INDEX_REFRESH_SECONDS = int(os.environ.get("SEARCH_VECTOR_INDEX_REFRESH_SECONDS", 30))
+
+# Query embedding cache: per-process LRU + shared Django cache tier
+SEARCH_QUERY_CACHE_SIZE = int(os.environ.get("SEARCH_QUERY_CACHE_SIZE", 1024))
+SEARCH_QUERY_CACHE_TTL = int(os.environ.get("SEARCH_QUERY_CACHE_TTL", 3600))
+SEARCH_QUERY_CACHE_SHARED_TTL = int(os.environ.get("SEARCH_QUERY_CACHE_SHARED_TTL", 86400))
+SEARCH_QUERY_CACHE_ALIAS = "default"
+# Whole search responses; 0 disables. Zero-result responses use the negative TTL.
+SEARCH_RESULT_CACHE_TTL = int(os.environ.get("SEARCH_RESULT_CACHE_TTL", 60))
+SEARCH_RESULT_CACHE_NEGATIVE_TTL = int(os.environ.get("SEARCH_RESULT_CACHE_NEGATIVE_TTL", 10))
+
+# QueryLog capture: rows are buffered per process and bulk-inserted by a
+# background thread every SEARCH_QUERY_LOG_FLUSH_SECONDS (or per full batch)
+SEARCH_QUERY_LOG_ENABLED = str(os.environ.get("SEARCH_QUERY_LOG_ENABLED", "True")).lower() in ("1", "true", "yes")
+SEARCH_QUERY_LOG_BATCH_SIZE = int(os.environ.get("SEARCH_QUERY_LOG_BATCH_SIZE", 100))
+SEARCH_QUERY_LOG_FLUSH_SECONDS = float(os.environ.get("SEARCH_QUERY_LOG_FLUSH_SECONDS", 2))
+SEARCH_QUERY_LOG_MAX_QUEUE = int(os.environ.get("SEARCH_QUERY_LOG_MAX_QUEUE", 10000))
+
+# Autocomplete (/api/search/suggest/): trigram title matches + popular queries
+SEARCH_SUGGEST_LIMIT = int(os.environ.get("SEARCH_SUGGEST_LIMIT", 8))
+SEARCH_SUGGEST_CACHE_TTL = int(os.environ.get("SEARCH_SUGGEST_CACHE_TTL", 30))
+
+# ----------------------
+# CACHES
+# ----------------------
+# Shared across workers when REDIS_URL is set, per-process memory otherwise.
+# Production needs the shared cache: search_worker's index writes invalidate
+# the web workers' cached search responses through it (the search result
+# cache stays off on LocMemCache; `manage.py check --deploy` warns).
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Optional URLs Paynow will redirect to after payment
 PAYNOW_RETURN_URL = os.environ.get("PAYNOW_RETURN_URL", "https://yourdomain.com/paynow/return/")
 PAYNOW_RESULT_URL = os.environ.get("PAYNOW_RESULT_URL", "https://yourdomain.com/paynow/result/")